@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup time benchmark of pftree.
+
+Times, in fresh interpreters, a bare Python startup, the import of the
+pftree module, and a CLI 'pftree --du' run on a small directory, and
+lists the slowest top level imports (from 'python -X importtime'). The
+exit status is non-zero if the pftree import (less the bare startup) is
+over the --budget, so that this can guard the startup time in CI.
+
+    python3 bench/import_bench.py [--repeat 10] [--budget 150] [--top 10]
+"""
+
+import  os
+import  sys
+import  time
+import  argparse
+import  tempfile
+import  statistics
+import  subprocess
+
+str_root    = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def run_time(l_cmd, repeat) -> list:
+    """
+    The wall times (in ms) of <repeat> runs of <l_cmd>.
+    """
+    l_time  = []
+    for r in range(repeat):
+        tic = time.perf_counter()
+        subprocess.run(l_cmd, cwd = str_root, check = True,
+                       stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+        l_time.append((time.perf_counter() - tic) * 1000)
+    return l_time
+
+def imports_top(top) -> list:
+    """
+    The <top> slowest top level imports of the pftree module, as
+    (cumulative us, module) tuples.
+    """
+    proc    = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                              'import pftree.pftree'],
+                             cwd = str_root, check = True,
+                             stdout = subprocess.DEVNULL,
+                             stderr = subprocess.PIPE, text = True)
+    l_import    = []
+    for str_line in proc.stderr.splitlines():
+        l_field = str_line.split('|')
+        if len(l_field) != 3 or not l_field[1].strip().isdigit(): continue
+        str_module  = l_field[2].rstrip()
+        # Only the imports made directly by pftree.pftree, which are
+        # indented by one level (two spaces) under it
+        if len(str_module) - len(str_module.lstrip()) != 3: continue
+        l_import.append((int(l_field[1]), str_module.strip()))
+    return sorted(l_import, reverse = True)[:top]
+
+def main():
+    parser  = argparse.ArgumentParser(description = 'pftree startup benchmark')
+    parser.add_argument('--repeat', type = int, default = 10)
+    parser.add_argument('--budget', type = float, default = 150,
+                        help = 'the pftree import budget (ms)')
+    parser.add_argument('--top',    type = int, default = 10)
+    args    = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as str_dir:
+        for i in range(10):
+            with open(os.path.join(str_dir, 'file%d.txt' % i), 'w') as fh:
+                fh.write('x' * i)
+        d_time  = {}
+        for str_case, l_cmd in [
+                ('python startup',  [sys.executable, '-c', 'pass']),
+                ('import pftree',   [sys.executable, '-c', 'import pftree.pftree']),
+                ('pftree --du',     [sys.executable, '-m', 'pftree', '--du',
+                                     '--inputDir', str_dir, '--outputDir', str_dir])]:
+            d_time[str_case]    = run_time(l_cmd, args.repeat)
+
+    print('%d runs each\n' % args.repeat)
+    print('%-16s %10s %10s' % ('', 'min ms', 'median ms'))
+    for str_case, l_time in d_time.items():
+        print('%-16s %10.1f %10.1f' % (str_case, min(l_time), statistics.median(l_time)))
+
+    print('\nslowest imports of pftree.pftree:\n')
+    for us, str_module in imports_top(args.top):
+        print('%10.1f ms  %s' % (us / 1000, str_module))
+
+    importTime  = statistics.median(d_time['import pftree']) - \
+                  statistics.median(d_time['python startup'])
+    print('\npftree import: %.1f ms (budget %.1f ms)' % (importTime, args.budget))
+    return 0 if importTime <= args.budget else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the per-directory cost of the pftree debug messages.
+
+Runs the per-directory messages of the test callbacks and of FS_filter()
+below the verbosity (as in any normal run), once eagerly -- formatting the
+message (with a pformat() of the file list) and handing it to dp.qprint(),
+as these methods originally did -- and once through pftree.qprint_lazy(),
+which drops the message before it is built.
+
+    python3 bench/log_bench.py [--dirs 2000] [--files 200] [--repeat 5]
+"""
+
+import  os
+import  sys
+import  time
+import  argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from    pftree.pftree       import pftree
+
+def tree_make():
+    return pftree({
+        'inputDir':         '.',
+        'str_desc':         '',
+        'outputDir':        '',
+        'verbosity':        1,
+        'syslog':           False,
+        'fileFilter':       '',
+        'dirFilter':        '',
+        'fileFilterLogic':  'OR',
+        'dirFilterLogic':   'OR',
+        'du':               False,
+        'duf':              False,
+        'table3D':          False
+    })
+
+def eager_messages(tree, l_dir):
+    """
+    The original per-directory messages.
+    """
+    for str_path, l_file in l_dir:
+        tree.dp.qprint("reading (in path %s):\n%s" %
+                            (str_path,
+                            tree.pp.pformat(l_file)),
+                            level = 5)
+        tree.dp.qprint("analyzing:\n%s" %
+                                tree.pp.pformat(l_file),
+                                level = 5)
+        tree.dp.qprint( "No valid files to analyze found in path %s!" %
+                            str_path, comms = 'warn', level = 5)
+
+def lazy_messages(tree, l_dir):
+    """
+    The same messages through qprint_lazy().
+    """
+    for str_path, l_file in l_dir:
+        tree.qprint_lazy("reading (in path %s):\n%s",
+                         str_path,
+                         lambda: tree.pp.pformat(l_file),
+                         level = 5)
+        tree.qprint_lazy("analyzing:\n%s",
+                         lambda: tree.pp.pformat(l_file),
+                         level = 5)
+        tree.qprint_lazy("No valid files to analyze found in path %s!",
+                         str_path, comms = 'warn', level = 5)
+
+def timeit(fn, repeat, *args):
+    l_time  = []
+    for r in range(repeat):
+        tic = time.perf_counter()
+        fn(*args)
+        l_time.append(time.perf_counter() - tic)
+    return min(l_time)
+
+def main():
+    parser  = argparse.ArgumentParser(description = 'pftree debug message benchmark')
+    parser.add_argument('--dirs',   type = int, default = 2000)
+    parser.add_argument('--files',  type = int, default = 200)
+    parser.add_argument('--repeat', type = int, default = 5)
+    args    = parser.parse_args()
+
+    tree    = tree_make()
+    l_dir   = [ ('/neuro/subject%05d/series%02d' % (d // 10, d % 10),
+                 [ 'IM-%04d-%05d.dcm' % (d, f) for f in range(args.files) ])
+                for d in range(args.dirs) ]
+    print('%d directories of %d files, verbosity 1, best of %d\n' %
+            (args.dirs, args.files, args.repeat))
+    f_eager = timeit(eager_messages, args.repeat, tree, l_dir)
+    f_lazy  = timeit(lazy_messages,  args.repeat, tree, l_dir)
+    print('%-8s %12s %14s' % ('', 'total ms', 'us per dir'))
+    print('%-8s %12.2f %14.2f' % ('eager', f_eager * 1000, f_eager / args.dirs * 1e6))
+    print('%-8s %12.2f %14.2f' % ('lazy',  f_lazy  * 1000, f_lazy  / args.dirs * 1e6))
+    print('\nspeedup: %.1fx' % (f_eager / f_lazy))
+
+if __name__ == '__main__':
+    sys.exit(main())
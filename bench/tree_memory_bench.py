@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark of the pftree tree stores.
+
+Builds the three trees of a pftree (d_inputTree, d_inputTreeCallback and
+d_outputTree) for a synthetic neuroimaging style hierarchy of
+
+    /neuro/users/<user>/data/<project>/<subject>/<study>/<series>
+
+directories, once as plain dicts keyed on full paths (the 'dict' store)
+and once as pathDicts over one shared pathTable (the 'compact' store), and
+reports the bytes per directory of the keys and store structures (the
+values, shared by both stores, are excluded).
+
+    python3 bench/tree_memory_bench.py [--dirs 1000000]
+"""
+
+import  os
+import  sys
+import  gc
+import  time
+import  argparse
+import  tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from    pftree.treestore    import pathTable, pathDict
+
+def paths_make(dirs):
+    """
+    Generate <dirs> directory paths, ten series per study.
+    """
+    for i in range(dirs):
+        series  = i % 10
+        study   = i // 10
+        subject = study // 4
+        project = subject // 500
+        user    = project // 5
+        yield '/neuro/users/user%03d/data/project%04d/subject%06d/study%07d/series%02d' % \
+                (user, project, subject, study, series)
+
+def store_build(str_store, dirs, value):
+    if str_store == 'compact':
+        table       = pathTable()
+        l_tree      = [pathDict(table), pathDict(table), pathDict(table)]
+    else:
+        l_tree      = [{}, {}, {}]
+    d_input, d_callback, d_output = l_tree
+    for str_path in paths_make(dirs):
+        d_input[str_path]       = value
+        d_callback[str_path]    = value
+        d_output[str_path]      = ""
+    return l_tree
+
+def measure(str_store, dirs, value):
+    """
+    Time the build and iteration of the store untraced, then measure its
+    memory on a second, traced, build.
+    """
+    gc.collect()
+    tic     = time.perf_counter()
+    l_tree  = store_build(str_store, dirs, value)
+    f_build = time.perf_counter() - tic
+    tic     = time.perf_counter()
+    for path, v in l_tree[0].items(): pass
+    f_iter  = time.perf_counter() - tic
+    del l_tree
+    gc.collect()
+    tracemalloc.start()
+    l_tree  = store_build(str_store, dirs, value)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del l_tree
+    return current, peak, f_build, f_iter
+
+def main():
+    parser  = argparse.ArgumentParser(description = 'pftree tree store memory benchmark')
+    parser.add_argument('--dirs',   type = int, default = 1000000)
+    args    = parser.parse_args()
+
+    # One shared value, so that only the keys and the stores are measured
+    value   = ['file.dcm']
+    print('%d directories, 3 trees\n' % args.dirs)
+    print('%-8s %14s %14s %10s %10s' % ('store', 'bytes/dir', 'peak bytes/dir', 'build s', 'iterate s'))
+    for str_store in ['dict', 'compact']:
+        current, peak, f_build, f_iter = measure(str_store, args.dirs, value)
+        print('%-8s %14.1f %14.1f %10.2f %10.2f' % (
+                str_store, current / args.dirs, peak / args.dirs, f_build, f_iter))
+
+if __name__ == '__main__':
+    sys.exit(main())
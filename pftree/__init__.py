@@ -1,4 +1,12 @@
-from importlib.metadata import Distribution
-
-__pkg       = Distribution.from_name(__package__)
-__version__ = __pkg.version
+def __getattr__(name):
+    """
+    The package metadata (__pkg) and __version__ are only looked up when
+    first asked for, since importlib.metadata is slow to import.
+    """
+    if name in ('__pkg', '__version__'):
+        from importlib.metadata import Distribution
+        pkg                     = Distribution.from_name(__package__)
+        globals()['__pkg']      = pkg
+        globals()['__version__'] = pkg.version
+        return globals()[name]
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -7,26 +7,33 @@
 #                        dev@babyMRI.org
 #
 
-import  pudb
 import sys, os
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), '../pftree'))
 
 try:
     from    .               import pftree
-    from    .               import __pkg, __version__
 except:
     from pftree             import pftree
-    from __init__           import __pkg, __version__
 
 
 from    argparse            import RawTextHelpFormatter
 from    argparse            import ArgumentParser
 
-import  pfmisc
 from    pfmisc._colors      import Colors
-from    pfmisc              import other
 
-str_desc = Colors.CYAN + f'''
+def package_get() -> tuple:
+    """
+    The package metadata and version. These are only looked up (which
+    imports the slow importlib.metadata) when they are shown.
+    """
+    try:
+        from    .           import __pkg, __version__
+    except:
+        from    __init__    import __pkg, __version__
+    return __pkg, __version__
+
+def description_get() -> str:
+    str_desc = Colors.CYAN + f'''
 
 
         __ _
@@ -48,7 +55,7 @@ str_desc = Colors.CYAN + f'''
         sponding directory in the filesystem.
 
                              -- version ''' + \
-             Colors.YELLOW + __version__ + Colors.CYAN + ''' --
+             Colors.YELLOW + package_get()[1] + Colors.CYAN + ''' --
 
         The main purpose of this module, other than probing a filesystem tree,
         is to provide some base methods to a caller that:
@@ -62,6 +69,7 @@ str_desc = Colors.CYAN + f'''
         or multiple threaded modes.
 
 ''' + Colors.NO_COLOUR
+    return str_desc
 
 package_IOcore  = """
         --inputDir <inputDir>                                                   \\
@@ -76,11 +84,21 @@ package_CLIcore = """
         [--filteFilterLogic AND|OR]                                             \\
         [--dirFilter <someFilter1,someFilter2,...>]                             \\
         [--dirFilterLogic AND|OR]                                               \\
+        [--exclude <rule1,rule2,...>]                                           \\
         [--maxdepth <dirDepth>]                                                 \\
         [--inputFile <inputFile>]                                               \\
         [--relativeDir]                                                         \\
+        [--incremental]                                                         \\
         [--overwrite]                                                           \\
         [--followLinks]                                                         \\
+        [--probeEngine walk|scandir]                                            \\
+        [--walkThreads <numWalkThreads>]                                        \\
+        [--index <indexFile>]                                                   \\
+        [--snapshot <snapshotFile>]                                             \\
+        [--sqlite <dbFile>]                                                     \\
+        [--sqliteFiles]                                                         \\
+        [--treeStore dict|compact]                                              \\
+        [--stream]                                                              \\
         [--outputLeafDir <outputLeafDirFormat>]                                 \\
         [--printElapsedTime]                                                    \\
         [--man]                                                                 \\
@@ -88,11 +106,20 @@ package_CLIcore = """
         [--verbosity <verbosity>]                                               \\
         [--version]                                                             \\
         [--threads <numThreads>]                                                \\
-        [--json]
+        [--executor thread|process]                                             \\
+        [--pipeline]                                                            \\
+        [--inFlight <numDirs>]                                                  \\
+        [--journal <journalFile>]                                               \\
+        [--resume]                                                              \\
+        [--json]                                                                \\
+        [--ndjson]
 """
 
 package_CLIself     = '''
         [--stats | --statsReverse | --du | --duf]                               \\
+        [--top <N>]                                                             \\
+        [--cumulative]                                                          \\
+        [--summarizeDepth <N>]                                                  \\
         [--3D]                                                                  \\
         [--jsonStats]                                                           \\
         [--syslog]                                                              \\
@@ -109,7 +136,7 @@ package_argSynopsisSelf = """
             * --verbosity 1: in addition, return a sorted (by size) list of
                              subdirectories in the search tree
             * --verbosity >1: same as above, but provide probing status updates.
-                              NOTE: this incurs a significant performance penalty!
+                              These are rate limited, and cost next to nothing.
 
         For --du | --duf
 
@@ -119,6 +146,24 @@ package_argSynopsisSelf = """
             * --du : only provide a summary
             * --duf: provide the (full) sorted list as well
 
+        [--top <N>]
+        If specified with one of the stats flags, only report the <N>
+        largest directories (or the <N> smallest, with --statsReverse).
+        These are picked out with a partial selection, so the whole tree
+        is never sorted. The totals still cover all of the directories.
+
+        [--cumulative]
+        If specified with one of the stats flags, report the cumulative
+        size (and file count) of each directory, i.e. the total over the
+        directory and all its subdirectories, as GNU 'du' does, rather than
+        the size of the files in the directory itself. Directories with no
+        files of their own (that only hold subdirectories) are reported too.
+
+        [--summarizeDepth <N>]
+        Implies '--cumulative', but only report the directories down to
+        <N> levels below the <inputDir>, as 'du --max-depth=<N>'. A depth
+        of 0 reports only the <inputDir> total.
+
         [--3D]
         A "toy" flag that simply shows the final stats report with an ASCII
         3D effect.
@@ -203,6 +248,11 @@ package_argSynopsisCore = """
         logical operation, and only files that contain this token string in
         their filename are preserved.
 
+        Besides plain substrings, a token can also be a glob (e.g. '*.dcm'),
+        a regular expression prefixed with 're:' (e.g. 're:^IM-[0-9]+') or
+        can be negated with a leading '!' (e.g. '!json') to always reject
+        the files it hits. The same token syntax applies to '--dirFilter'.
+
         [--filteFilterLogic AND|OR]
         The logical operator to apply across the fileFilter operation. Default
         is OR.
@@ -217,6 +267,16 @@ package_argSynopsisCore = """
         The logical operator to apply across the dirFilter operation. Default
         is OR.
 
+        [--exclude <rule1,rule2,...>]
+        An optional comma-delimited list of rules for directories to prune
+        from the filesystem walk. Excluded directories (and everything below
+        them) are never descended into, so they cost no filesystem access
+        at all. Each rule is either a plain directory name (e.g. '.git'), a
+        glob (e.g. 'scratch*') or a regular expression prefixed with 're:'
+        (e.g. 're:^tmp[0-9]+$'). Globs and regexes that contain a '/' are
+        matched against the full directory path, otherwise against the
+        directory name only.
+
         [--outputLeafDir <outputLeafDirFormat>]
         If specified, will apply the <outputLeafDirFormat> to the output
         directories containing data. This is useful to blanket describe
@@ -247,14 +307,133 @@ package_argSynopsisCore = """
               all the target input file data across the entire input directory
               tree.
 
+        [--executor thread|process]
+        The kind of worker pool that runs the analysis loop when '--threads'
+        is non-zero. The default 'thread' is best suited to analyses that
+        release the GIL (IO, or compiled code). For CPU bound pure python
+        analyses (header parsing, image statistics), 'process' runs the
+        analysis on a pool of <numThreads> processes instead. Only the
+        (path, data) work items and the analysis results are exchanged
+        with the worker processes, and so must be picklable.
+
+        [--pipeline]
+        If specified, run the read, analysis and write loops concurrently as
+        stages of a pipeline connected by bounded queues: a read thread, a
+        pool of <numThreads> (at least one) analysis threads and the write
+        stage. File IO thus overlaps with the analysis, and, unlike
+        '--threads' alone, the input data of the whole tree is never held
+        in memory at once. The analysis stage always runs in threads, so
+        '--executor process' does not apply (and is refused).
+
+        [--inFlight <numDirs>]
+        The maximum number of directories that are in flight between the
+        read and the write stages of the '--pipeline'. This caps the memory
+        held by read data. Defaults to four times the number of analysis
+        threads.
+
+        [--journal <journalFile>]
+        If specified, append a line to the <journalFile> for each directory
+        as its read/analysis/write chain completes, recording the status of
+        each stage. The journal is flushed as the run progresses, so it is
+        a checkpoint of the work done should the run die part way through.
+
+        [--resume]
+        If specified with '--journal', reload the <journalFile> and skip
+        the directories that it records as completed, so that a restarted
+        run only processes the remaining directories.
+
         [--json]
         If specified, do a JSON dump of the entire return payload.
 
+        [--ndjson]
+        If specified, stream the output as newline delimited JSON instead:
+        one compact record per directory, written as soon as the directory
+        has been constructed (with '--stream', while the walk goes on), but
+        for the root directory's, which is written once the tree is done,
+        followed by a single summary record of the run status and totals.
+        This replaces the '--json' and '--jsonStats' dumps, and keeps the
+        output memory flat for very large trees.
+
         [--followLinks]
         If specified, follow symbolic links.
 
+        [--probeEngine walk|scandir]
+        The engine used to probe the filesystem. The default 'walk' uses a
+        plain os.walk. The 'scandir' engine uses os.scandir directly and
+        captures the size, mtime and inode of each file in a single stat
+        during the probe, so that the directory sizes for '--stats' and
+        '--du' do not need to re-stat every file.
+
+        [--walkThreads <numWalkThreads>]
+        If specified (and non-zero), probe the filesystem with a pool of
+        <numWalkThreads> threads that list directories concurrently. This
+        is independent of '--threads' (which only applies to the analysis
+        loop) and is most useful on high latency filesystems such as NFS
+        or Lustre, where the probe is bound by the round trip time of each
+        directory listing. Implies '--probeEngine scandir'. Note that the
+        order of directories in the resultant tree is not deterministic.
+
+        [--index <indexFile>]
+        If specified, keep a persistent (JSON) index of the probe in <indexFile>:
+        each directory's mtime along with its listed files and their sizes.
+        On the next run, directories whose mtime is unchanged are not listed
+        (nor their files stat'ed) again, and their indexed entries are used
+        instead. Repeated '--du'/'--stats' runs over a large and mostly
+        static tree then cost little more than a stat per directory. Note
+        that a directory mtime only changes when files are added, removed
+        or renamed in it, not when an existing file is rewritten in place.
+        Implies the scandir probe engine.
+
+        [--snapshot <snapshotFile>]
+        If specified, save the constructed tree (each directory path with
+        its number of files and size) to the compact binary <snapshotFile>.
+        The paths are sorted and front coded and the sizes and counts are
+        stored as fixed width columns, so that the snapshot can be opened
+        with 'pftree.snapshot.snapshot(<snapshotFile>)' and searched or
+        totalled through an mmap, without loading the tree into memory.
+
+        [--sqlite <dbFile>]
+        If specified, export the constructed tree to the SQLite <dbFile>:
+        a 'dirs' table of each directory path with its parent, its depth
+        below the <inputDir>, its number of files and its size, indexed on
+        path, parent, depth and size, so that repeated questions about the
+        tree are answered with an indexed query rather than a new walk.
+        For example, the number of directories larger than 1MB under each
+        directory one level down,
+
+            sqlite3 <dbFile> "SELECT parent, COUNT(*) FROM dirs
+                              WHERE depth = 2 AND size > 1048576
+                              GROUP BY parent"
+
+        [--sqliteFiles]
+        If specified with '--sqlite', also export a 'files' table with one
+        row (the directory id and file name) per file.
+
+        [--treeStore dict|compact]
+        The store for the in memory trees. The default 'dict' keys plain
+        dictionaries on full path strings. With 'compact', the trees share
+        one table of path components (each directory is a node that points
+        to its parent and its interned name), so that the leading parts of
+        the paths in deep hierarchies are stored once rather than once per
+        directory, at the cost of rebuilding each path as it is iterated.
+
+        [--stream]
+        If specified, stream each directory record from the filesystem probe
+        directly into the tree construction (and size computation) as it is
+        walked, rather than first building the complete list of probed
+        directories and files. This keeps peak memory close to the size of
+        the final tree, and processing starts while the walk is running.
+
+        [--incremental]
+        If specified, skip the whole read/analysis/write chain for each
+        directory whose output leaf (under <outputDir>, and honouring any
+        '--outputLeafDir') already holds files that are no older than the
+        input directory and its files, in the manner of 'make'. Reruns over
+        a mostly unchanged tree thus only process what has changed.
+
         [--overwrite]
-        If specified, allow for overwriting of existing files
+        If specified, allow for overwriting of existing files. This also
+        turns off the skipping of up to date outputs by '--incremental'.
 
         [--man]
         Show full help.
@@ -354,159 +533,288 @@ def synopsis(ab_shortOnly = False):
         return shortSynopsis + description
 
 
-parserIO    = ArgumentParser(description        = 'I/O',
-                             formatter_class    = RawTextHelpFormatter,
-                             add_help           = False)
-parserCore  = ArgumentParser(description        = 'Core',
-                             formatter_class    = RawTextHelpFormatter,
-                             add_help           = False)
-parserSelf  = ArgumentParser(description        = 'Self specific',
-                             formatter_class    = RawTextHelpFormatter,
-                             add_help           = False)
-
-
-parserIO.add_argument("--inputDir", '--inputdir',
-                    help    = "input dir",
-                    dest    = 'inputDir',
-                    default = '')
-parserIO.add_argument("--outputDir", '--outputdir',
-                    help    = "output image directory",
-                    dest    = 'outputDir',
-                    default = '.')
-
-parserCore.add_argument("--maxDepth",
-                    help    = "max depth, counting from zero, to descend",
-                    dest    = 'maxDepth',
-                    default = '-1')
-parserCore.add_argument("--inputFile",
-                    help    = "input file",
-                    dest    = 'inputFile',
-                    default = '')
-parserCore.add_argument("--man",
-                    help    = "man",
-                    dest    = 'man',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--synopsis",
-                    help    = "short synopsis",
-                    dest    = 'synopsis',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--verbosity",
-                    help    = "verbosity level for app",
-                    dest    = 'verbosity',
-                    default = "1")
-parserCore.add_argument("--threads",
-                    help    = "number of threads for innermost loop processing",
-                    dest    = 'threads',
-                    default = "0")
-parserCore.add_argument("--outputLeafDir",
-                    help    = "formatting spec for output leaf directory",
-                    dest    = 'outputLeafDir',
-                    default = "")
-parserCore.add_argument("--relativeDir",
-                    help    = "use relative directories",
-                    dest    = 'relativeDir',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--json",
-                    help    = "JSON final return",
-                    dest    = 'json',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--printElapsedTime",
-                    help    = "print program run time",
-                    dest    = 'printElapsedTime',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--followLinks",
-                    help    = "follow symbolic links",
-                    dest    = 'followLinks',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--overwrite",
-                    help    = "allow for overwriting of existing files",
-                    dest    = 'overwrite',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument('--version',
-                    help    = 'if specified, print version number',
-                    dest    = 'b_version',
-                    action  = 'store_true',
-                    default = False)
-parserCore.add_argument("--fileFilter",
-                    help    = "a list of comma separated string filters to apply across the input file space",
-                    dest    = 'fileFilter',
-                    default = '')
-parserCore.add_argument("--fileFilterLogic",
-                    help    = "the logic to apply across the file filter",
-                    dest    = 'fileFilterLogic',
-                    default = 'OR')
-parserCore.add_argument("--dirFilter",
-                    help    = "a list of comma separated string filters to apply across the input dir space",
-                    dest    = 'dirFilter',
-                    default = '')
-parserCore.add_argument("--dirFilterLogic",
-                    help    = "the logic to apply across the dir filter",
-                    dest    = 'dirFilterLogic',
-                    default = 'OR')
-parserCore.add_argument("--syslog",
-                    help    = "show outputs in syslog style",
-                    dest    = 'syslog',
-                    action  = 'store_true',
-                    default = False)
-
-parserSelf.add_argument("--stats",
-                    help    = "show some quick stats",
-                    dest    = 'stats',
-                    action  = 'store_true',
-                    default = False)
-parserSelf.add_argument("--statsReverse",
-                    help    = "show some quick stats (reverse order)",
-                    dest    = 'statsReverse',
-                    action  = 'store_true',
-                    default = False)
-parserSelf.add_argument("--du",
-                    help    = "show disk usage in the GNU du style",
-                    dest    = 'du',
-                    action  = 'store_true',
-                    default = False)
-parserSelf.add_argument("--duf",
-                    help    = "show disk usage in the GNU du style (no console updating)",
-                    dest    = 'duf',
-                    action  = 'store_true',
-                    default = False)
-parserSelf.add_argument("--3D",
-                    help    = "show table in ASCII 3D",
-                    dest    = 'table3D',
-                    action  = 'store_true',
-                    default = False)
-parserSelf.add_argument("--jsonStats",
-                    help    = "JSON dump stats",
-                    dest    = 'jsonStats',
-                    action  = 'store_true',
-                    default = False)
-parserSelf.add_argument("--test",
-                    help    = "perform a test run of the read/analyze/write loop -- arg indicates sleep length in analyze",
-                    dest    = 'test',
-                    default = '')
-
-# Stand alone parser
-parserSA     = ArgumentParser(description       = str_desc,
-                             formatter_class    = RawTextHelpFormatter,
-                             parents            = [parserIO, parserCore, parserSelf])
-
-# DS conformant parser
-parserDS     = ArgumentParser(description       = str_desc,
-                             formatter_class    = RawTextHelpFormatter,
-                             parents            = [parserCore, parserSelf])
+class pftreeParser(ArgumentParser):
+    """
+    An ArgumentParser whose description (the banner, with the package
+    version) is only built when the help is actually shown.
+    """
+
+    def format_help(self):
+        if self.description is None: self.description = description_get()
+        return super().format_help()
+
+def parser_build(b_DS = True) -> dict:
+    """
+    Build the CLI parsers: the I/O, core and self specific parent parsers,
+    the stand alone parser and (with <b_DS>, or else None) the DS
+    conformant parser, keyed on their names.
+    """
+    parserIO    = ArgumentParser(description        = 'I/O',
+                                 formatter_class    = RawTextHelpFormatter,
+                                 add_help           = False)
+    parserCore  = ArgumentParser(description        = 'Core',
+                                 formatter_class    = RawTextHelpFormatter,
+                                 add_help           = False)
+    parserSelf  = ArgumentParser(description        = 'Self specific',
+                                 formatter_class    = RawTextHelpFormatter,
+                                 add_help           = False)
+
+
+    parserIO.add_argument("--inputDir", '--inputdir',
+                        help    = "input dir",
+                        dest    = 'inputDir',
+                        default = '')
+    parserIO.add_argument("--outputDir", '--outputdir',
+                        help    = "output image directory",
+                        dest    = 'outputDir',
+                        default = '.')
+
+    parserCore.add_argument("--maxDepth",
+                        help    = "max depth, counting from zero, to descend",
+                        dest    = 'maxDepth',
+                        default = '-1')
+    parserCore.add_argument("--inputFile",
+                        help    = "input file",
+                        dest    = 'inputFile',
+                        default = '')
+    parserCore.add_argument("--man",
+                        help    = "man",
+                        dest    = 'man',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--synopsis",
+                        help    = "short synopsis",
+                        dest    = 'synopsis',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--verbosity",
+                        help    = "verbosity level for app",
+                        dest    = 'verbosity',
+                        default = "1")
+    parserCore.add_argument("--threads",
+                        help    = "number of threads for innermost loop processing",
+                        dest    = 'threads',
+                        default = "0")
+    parserCore.add_argument("--executor",
+                        help    = "the analysis pool for '--threads': 'thread' or 'process'",
+                        dest    = 'executor',
+                        choices = ['thread', 'process'],
+                        default = 'thread')
+    parserCore.add_argument("--pipeline",
+                        help    = "run the read/analyze/write callbacks as a concurrent pipeline",
+                        dest    = 'pipeline',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--inFlight",
+                        help    = "max number of directories in flight in the '--pipeline'",
+                        dest    = 'inFlight',
+                        default = "0")
+    parserCore.add_argument("--journal",
+                        help    = "checkpoint journal file of completed directories",
+                        dest    = 'journal',
+                        default = '')
+    parserCore.add_argument("--resume",
+                        help    = "skip the directories completed in the '--journal'",
+                        dest    = 'resume',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--walkThreads",
+                        help    = "number of threads for the filesystem probe",
+                        dest    = 'walkThreads',
+                        default = "0")
+    parserCore.add_argument("--outputLeafDir",
+                        help    = "formatting spec for output leaf directory",
+                        dest    = 'outputLeafDir',
+                        default = "")
+    parserCore.add_argument("--relativeDir",
+                        help    = "use relative directories",
+                        dest    = 'relativeDir',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--json",
+                        help    = "JSON final return",
+                        dest    = 'json',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--ndjson",
+                        help    = "stream NDJSON records per directory",
+                        dest    = 'ndjson',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--printElapsedTime",
+                        help    = "print program run time",
+                        dest    = 'printElapsedTime',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--followLinks",
+                        help    = "follow symbolic links",
+                        dest    = 'followLinks',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--probeEngine",
+                        help    = "the filesystem probe engine: 'walk' or 'scandir'",
+                        dest    = 'probeEngine',
+                        choices = ['walk', 'scandir'],
+                        default = 'walk')
+    parserCore.add_argument("--index",
+                        help    = "persistent probe index file for incremental rescans",
+                        dest    = 'index',
+                        default = '')
+    parserCore.add_argument("--snapshot",
+                        help    = "save the constructed tree to a binary snapshot file",
+                        dest    = 'snapshot',
+                        default = '')
+    parserCore.add_argument("--sqlite",
+                        help    = "export the constructed tree to an SQLite database",
+                        dest    = 'sqlite',
+                        default = '')
+    parserCore.add_argument("--sqliteFiles",
+                        help    = "with --sqlite, also export a row per file",
+                        dest    = 'sqliteFiles',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--treeStore",
+                        help    = "the in memory tree store: 'dict' or 'compact'",
+                        dest    = 'treeStore',
+                        choices = ['dict', 'compact'],
+                        default = 'dict')
+    parserCore.add_argument("--stream",
+                        help    = "stream the probe directly into the tree construction",
+                        dest    = 'stream',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--incremental",
+                        help    = "skip directories whose outputs are up to date",
+                        dest    = 'incremental',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--overwrite",
+                        help    = "allow for overwriting of existing files",
+                        dest    = 'overwrite',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument('--version',
+                        help    = 'if specified, print version number',
+                        dest    = 'b_version',
+                        action  = 'store_true',
+                        default = False)
+    parserCore.add_argument("--fileFilter",
+                        help    = "a list of comma separated string filters to apply across the input file space",
+                        dest    = 'fileFilter',
+                        default = '')
+    parserCore.add_argument("--exclude",
+                        help    = "a list of comma separated dir names, globs or 're:' regexes to prune from the walk",
+                        dest    = 'exclude',
+                        default = '')
+    parserCore.add_argument("--fileFilterLogic",
+                        help    = "the logic to apply across the file filter",
+                        dest    = 'fileFilterLogic',
+                        default = 'OR')
+    parserCore.add_argument("--dirFilter",
+                        help    = "a list of comma separated string filters to apply across the input dir space",
+                        dest    = 'dirFilter',
+                        default = '')
+    parserCore.add_argument("--dirFilterLogic",
+                        help    = "the logic to apply across the dir filter",
+                        dest    = 'dirFilterLogic',
+                        default = 'OR')
+    parserCore.add_argument("--syslog",
+                        help    = "show outputs in syslog style",
+                        dest    = 'syslog',
+                        action  = 'store_true',
+                        default = False)
+
+    parserSelf.add_argument("--stats",
+                        help    = "show some quick stats",
+                        dest    = 'stats',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--statsReverse",
+                        help    = "show some quick stats (reverse order)",
+                        dest    = 'statsReverse',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--du",
+                        help    = "show disk usage in the GNU du style",
+                        dest    = 'du',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--duf",
+                        help    = "show disk usage in the GNU du style (no console updating)",
+                        dest    = 'duf',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--top",
+                        help    = "only report the N largest (--statsReverse: smallest) directories",
+                        dest    = 'top',
+                        default = "0")
+    parserSelf.add_argument("--cumulative",
+                        help    = "report cumulative subtree sizes",
+                        dest    = 'cumulative',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--summarizeDepth",
+                        help    = "report cumulative subtree sizes down to this depth",
+                        dest    = 'summarizeDepth',
+                        default = "-1")
+    parserSelf.add_argument("--3D",
+                        help    = "show table in ASCII 3D",
+                        dest    = 'table3D',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--jsonStats",
+                        help    = "JSON dump stats",
+                        dest    = 'jsonStats',
+                        action  = 'store_true',
+                        default = False)
+    parserSelf.add_argument("--test",
+                        help    = "perform a test run of the read/analyze/write loop -- arg indicates sleep length in analyze",
+                        dest    = 'test',
+                        default = '')
+
+    # Stand alone parser
+    parserSA    = pftreeParser(formatter_class      = RawTextHelpFormatter,
+                               parents              = [parserIO, parserCore, parserSelf])
+
+    # DS conformant parser
+    parserDS    = None
+    if b_DS:
+        parserDS    = pftreeParser(formatter_class      = RawTextHelpFormatter,
+                                   parents              = [parserCore, parserSelf])
+
+    return {
+        'parserIO':     parserIO,
+        'parserCore':   parserCore,
+        'parserSelf':   parserSelf,
+        'parserSA':     parserSA,
+        'parserDS':     parserDS
+    }
+
+def __getattr__(str_name):
+    """
+    The module level parsers and description (str_desc) of the earlier
+    versions, which are only built when first accessed, so that they do
+    not weigh on the CLI startup.
+    """
+    if str_name in ('parserIO', 'parserCore', 'parserSelf', 'parserSA', 'parserDS'):
+        globals().update(parser_build())
+        return globals()[str_name]
+    if str_name == 'str_desc':
+        globals()['str_desc']   = description_get()
+        return globals()['str_desc']
+    raise AttributeError("module %r has no attribute %r" % (__name__, str_name))
 
 def main(argv = None):
 
-    args = parserSA.parse_args()
+    parserSA            = parser_build(b_DS = False)['parserSA']
+    args                = parserSA.parse_args()
+
+    if args.pipeline and args.executor == 'process':
+        parserSA.error("--pipeline runs its analysis stage in threads, " +
+                       "and cannot be combined with --executor process")
 
     if args.man or args.synopsis:
-        print(str_desc)
+        print(description_get())
         if args.man:
             str_help     = synopsis(False)
         else:
@@ -515,10 +823,10 @@ def main(argv = None):
         return 1
 
     if args.b_version:
-        print("Name:    %s\nVersion: %s" % (__pkg.name, __version__))
+        pkg, str_version    = package_get()
+        print("Name:    %s\nVersion: %s" % (pkg.name, str_version))
         return 1
 
-    args.str_version    = __version__
     args.str_desc       = synopsis(True)
 
     try:
@@ -529,7 +837,8 @@ def main(argv = None):
     # And now run it!
     d_pftree = pf_tree.run(timerStart = True)
 
-    if args.printElapsedTime and not args.json and not args.jsonStats:
+    if args.printElapsedTime and not args.json and not args.jsonStats \
+                             and not args.ndjson:
         pf_tree.dp.qprint(
                             "Elapsed time = %f seconds" %
                             d_pftree['runTime'], level = 0
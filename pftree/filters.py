@@ -0,0 +1,139 @@
+# System imports
+import      re
+import      fnmatch
+
+class nameFilter(object):
+    """
+    A filter over name strings (file names or directory paths) that is
+    compiled once from a comma separated filter expression, such as the
+    CLI `--fileFilter` or `--dirFilter`, and then evaluates each name in
+    a single pass.
+
+    Each token in the expression is one of
+
+        * a plain substring, e.g. 'dcm' -- the original pftree semantics;
+        * a glob, e.g. '*.dcm' (any token containing '*', '?' or '[')
+          which must match the whole name;
+        * a regular expression prefixed with 're:', e.g. 're:^IM-\\d+';
+
+    and any token can be negated with a leading '!', e.g. '!.json', in
+    which case names hit by the token are always rejected.
+
+    The positive tokens are combined with a logical OR (the default) or
+    AND. The whole expression is compiled into one short-circuiting
+    condition, so that each name is visited only once, however many
+    tokens there are, and is only ever returned once, even if several
+    tokens hit it. A single substring token -- the common case, which
+    gains nothing from compiling -- is simply tested with 'in'.
+
+    An empty expression passes all names.
+    """
+
+    def __init__(self, str_expression = '', str_logic = 'OR'):
+        self.str_expression     : str   = str_expression
+        self.b_AND              : bool  = str_logic.upper() == 'AND'
+        self.l_inline           : list  = []
+        self.l_substring        : list  = []
+        self.l_regex            : list  = []
+        self.l_negateInline     : list  = []
+        self.l_negateRegex      : list  = []
+        self.str_condition      : str   = ''
+        self.fn_match                   = None
+        self.fn_filter                  = None
+
+        for str_token in str_expression.split(','):
+            if not len(str_token): continue
+            b_negate    = str_token.startswith('!')
+            if b_negate: str_token = str_token[1:]
+            str_inline  = ''
+            if str_token.startswith('re:'):
+                str_regex   = '(?:%s)' % str_token[3:]
+            elif any(c in str_token for c in '*?['):
+                str_inline  = nameFilter.glob_inline(str_token)
+                str_regex   = '(?:^%s)' % fnmatch.translate(str_token)
+            else:
+                str_inline  = '%r in x' % str_token
+                if not b_negate: self.l_substring.append(str_token)
+            if str_inline:
+                if b_negate:    self.l_negateInline.append(str_inline)
+                else:           self.l_inline.append(str_inline)
+                continue
+            if b_negate:    self.l_negateRegex.append(str_regex)
+            else:           self.l_regex.append(str_regex)
+        self.filter_compile()
+
+    @staticmethod
+    def glob_inline(str_glob) -> str:
+        """
+        Return an inline condition on a name 'x' for the simple globs that
+        do not need a regex -- a '*' on either or both ends of a literal,
+        e.g. '*.dcm' is simply x.endswith('.dcm') -- or '' otherwise.
+        """
+        str_literal = str_glob.strip('*')
+        if any(c in str_literal for c in '*?['):
+            return ''
+        b_head      = str_glob.startswith('*')
+        b_tail      = str_glob.endswith('*')
+        if b_head and b_tail:   return '%r in x'            % str_literal
+        if b_head:              return 'x.endswith(%r)'     % str_literal
+        if b_tail:              return 'x.startswith(%r)'   % str_literal
+        return ''
+
+    def filter_compile(self):
+        """
+        Compile the tokens into a single boolean condition on a name 'x',
+        and from this condition into a match function and a list filter.
+
+        Substring (and simple glob) tokens are inlined as string tests and
+        all other regex/glob tokens are folded into one compiled regex, so
+        that filtering a list is a single comprehension with no per-name
+        function call other than for regex tokens.
+        """
+        if len(self.l_substring) == 1 and len(self.l_inline) == 1 and \
+           not (self.l_regex or self.l_negateInline or self.l_negateRegex):
+            str_token           = self.l_substring[0]
+            self.str_condition  = self.l_inline[0]
+            self.fn_match       = lambda x: str_token in x
+            self.fn_filter      = lambda l: [x for x in l if str_token in x]
+            return
+
+        d_namespace     = {}
+        l_hit           = list(self.l_inline)
+        l_miss          = list(self.l_negateInline)
+        if self.l_regex:
+            if self.b_AND:
+                for i, str_regex in enumerate(self.l_regex):
+                    d_namespace['hit%d' % i]    = re.compile(str_regex).search
+                    l_hit.append('hit%d(x)' % i)
+            else:
+                d_namespace['hit']  = re.compile('|'.join(self.l_regex)).search
+                l_hit.append('hit(x)')
+        if self.l_negateRegex:
+            d_namespace['miss'] = re.compile('|'.join(self.l_negateRegex)).search
+            l_miss.append('miss(x)')
+
+        l_condition     = []
+        if l_hit:
+            l_condition.append('(%s)' % (' and ' if self.b_AND else ' or ').join(l_hit))
+        if l_miss:
+            l_condition.append('not (%s)' % ' or '.join(l_miss))
+        self.str_condition  = ' and '.join(l_condition) or 'True'
+        self.fn_match       = eval('lambda x: %s' % self.str_condition,
+                                   d_namespace)
+        self.fn_filter      = eval('lambda l: [x for x in l if %s]' % self.str_condition,
+                                   d_namespace)
+
+    def __bool__(self):
+        return self.str_condition != 'True'
+
+    def match(self, str_name) -> bool:
+        """
+        Return True if the <str_name> passes the filter.
+        """
+        return self.fn_match(str_name)
+
+    def __call__(self, l_name) -> list:
+        """
+        Return the names in <l_name> that pass the filter, in order.
+        """
+        return self.fn_filter(l_name)
@@ -0,0 +1,125 @@
+"""
+A persistent index of the last pftree filesystem probe.
+
+The index maps each directory that was listed to its mtime at the time,
+along with what the listing found (subdirectories, files and their
+fileStat records). On the next probe, any directory whose mtime is
+unchanged is not listed (nor are its files stat'ed) again -- the cached
+entry is reused instead -- so that a rescan of a mostly unchanged tree
+costs little more than one stat per directory.
+
+Note that a directory mtime only changes when entries are added, removed
+or renamed in it. A file that is rewritten in place keeps its cached size
+until its directory changes (or the index is removed).
+
+The index file is plain JSON data, so that loading an index (which may
+come from anywhere) never executes anything.
+"""
+
+# System imports
+import      os
+import      time
+import      json
+import      threading
+from        collections         import  namedtuple
+
+# A per-file record of the stat data captured (once) by the scandir probe.
+# Symbolic links are never stat'ed and carry a zero size and mtime. This is
+# defined here (rather than in pftree.py) so that pickled records, as sent
+# to and from process pool workers, can be resolved by reference.
+fileStat = namedtuple('fileStat', ['size', 'mtime', 'inode', 'isLink'])
+
+class probeIndex(object):
+    """
+    An on-disk index of directory listings, keyed on directory path and
+    validated by directory mtime.
+    """
+
+    # Bumped whenever the format of the index file changes
+    version     = 2
+
+    # Directories modified less than this many seconds before being listed
+    # are not trusted on the next probe, since a change in the same mtime
+    # tick as the listing would otherwise go unnoticed.
+    f_racyWindow    = 2.0
+
+    def __init__(self, str_indexFile, t_spec = ()):
+        self.str_indexFile  : str   = str_indexFile
+        self.t_spec         : tuple = tuple(t_spec)
+        self.d_cache        : dict  = {}
+        self.d_index        : dict  = {}
+        self.hits           : int   = 0
+        self.misses         : int   = 0
+        self.lock                   = threading.Lock()
+
+    def load(self) -> bool:
+        """
+        Load the index from disk. An index that is missing, unreadable,
+        of another version or built with another <t_spec> (the filters
+        that shaped the listings) is ignored, and the probe starts over.
+        """
+        self.d_cache    = {}
+        try:
+            with open(self.str_indexFile, 'r', encoding = 'utf-8') as fh:
+                d_load  = json.load(fh)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(d_load, dict)                 or \
+           d_load.get('version') != probeIndex.version  or \
+           d_load.get('spec')    != list(self.t_spec):
+            return False
+        # Each entry is stored as [mtime, dirs, files, l_stat, l_dirLinks],
+        # with the fileStat records of l_stat as plain lists
+        try:
+            d_cache = { root : (mtime, dirs, files,
+                                [ fileStat(*l_field) for l_field in l_stat ],
+                                l_dirLinks)
+                        for root, (mtime, dirs, files, l_stat, l_dirLinks)
+                            in d_load['d_index'].items() }
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return False
+        self.d_cache    = d_cache
+        return True
+
+    def scan(self, root, fn_filter, fn_scan):
+        """
+        A drop in for pftree.dir_scan(root, fn_filter) that returns the
+        cached (dirs, files, l_stat, l_dirLinks) of <root> if its mtime is
+        unchanged, and otherwise lists it with <fn_scan> and caches that.
+        """
+        mtime   = os.stat(root).st_mtime_ns
+        entry   = self.d_cache.get(root)
+        if entry is not None and entry[0] == mtime:
+            t_scan  = entry[1:]
+            with self.lock: self.hits   += 1
+        else:
+            t_scan  = fn_scan(root, fn_filter)
+            if time.time_ns() - mtime < probeIndex.f_racyWindow * 1e9:
+                mtime   = None
+            with self.lock: self.misses += 1
+        self.d_index[root]  = (mtime,) + tuple(t_scan)
+        dirs, files, l_stat, l_dirLinks = t_scan
+        # The caller may prune the dirs in place
+        return list(dirs), files, l_stat, l_dirLinks
+
+    def save(self) -> bool:
+        """
+        Save the directories seen by this probe (only) as the new index,
+        so that directories that have since been removed drop out of it.
+        The index is written to a temporary file and renamed over the old
+        one, so that an interrupted save never leaves a corrupt index.
+        """
+        str_tmp     = '%s.%d.tmp' % (self.str_indexFile, os.getpid())
+        try:
+            str_dir = os.path.dirname(self.str_indexFile)
+            if len(str_dir): os.makedirs(str_dir, exist_ok = True)
+            with open(str_tmp, 'w', encoding = 'utf-8') as fh:
+                json.dump({
+                    'version':  probeIndex.version,
+                    'spec':     self.t_spec,
+                    'd_index':  self.d_index
+                }, fh, separators = (',', ':'))
+            os.replace(str_tmp, self.str_indexFile)
+        except (OSError, TypeError, ValueError):
+            return False
+        return True
@@ -0,0 +1,88 @@
+"""
+A checkpoint journal for pftree.tree_process() runs.
+
+The journal is an append-only file of JSON lines, one line per directory
+that has been through the read/analysis/write chain, recording the status
+of each stage run on it, for example
+
+    {"path": "a/b", "read": true, "analyze": true, "write": true, "status": true, "time": 1700000000.0}
+
+Lines are flushed as each directory completes, so that a run that dies
+leaves a journal of everything done up to that point. On resume, the
+journal is reloaded and any directory whose last record shows that all
+its stages succeeded is skipped.
+"""
+
+# System imports
+import      os
+import      json
+import      time
+import      threading
+
+class journal(object):
+    """
+    An append-only journal of the directories completed by a run.
+    """
+
+    def __init__(self, str_journalFile):
+        self.str_journalFile    : str   = str_journalFile
+        self.l_stages           : list  = []
+        self.d_pending          : dict  = {}
+        self.fh                         = None
+        self.lock                       = threading.Lock()
+
+    def load(self) -> set:
+        """
+        Return the set of paths journaled as complete. Later records of
+        a path supersede earlier ones, so that a directory that failed and
+        then succeeded (or vice versa) is judged by its last attempt. A
+        truncated final line (from a run that died mid-write) is ignored.
+        """
+        d_status    = {}
+        if not os.path.isfile(self.str_journalFile):
+            return set()
+        with open(self.str_journalFile) as fh:
+            for str_line in fh:
+                try:
+                    d_record    = json.loads(str_line)
+                except ValueError:
+                    continue
+                d_status[d_record['path']]  = d_record.get('status', False)
+        return { k for k, v in d_status.items() if v }
+
+    def open(self, l_stages):
+        """
+        Open the journal for appending, for a run of the <l_stages>
+        (some ordered subset of 'read', 'analyze', 'write').
+        """
+        self.l_stages   = list(l_stages)
+        self.d_pending  = {}
+        str_dir         = os.path.dirname(self.str_journalFile)
+        if len(str_dir): os.makedirs(str_dir, exist_ok = True)
+        self.fh         = open(self.str_journalFile, 'a', buffering = 1)
+
+    def record(self, path, str_stage, b_status):
+        """
+        Record the status of <str_stage> on <path>, and append the record
+        for the <path> to the journal once its chain is done. This is the
+        case after the last stage of the run or after a failed analysis,
+        since no write follows a failed analysis.
+        """
+        if not self.fh: return
+        with self.lock:
+            d_stages                = self.d_pending.setdefault(path, {})
+            d_stages[str_stage]     = bool(b_status)
+            if str_stage != self.l_stages[-1] and \
+               (str_stage != 'analyze' or b_status):
+                return
+            del self.d_pending[path]
+            d_record                = {'path': path}
+            d_record.update(d_stages)
+            d_record['status']      = all(d_stages.get(s, False) for s in self.l_stages)
+            d_record['time']        = time.time()
+            self.fh.write(json.dumps(d_record) + '\n')
+
+    def close(self):
+        if self.fh:
+            self.fh.close()
+            self.fh     = None
@@ -4,7 +4,6 @@ import      sys
 import      getpass
 import      argparse
 import      json
-import      pprint
 import      time
 
 # Project specific imports
@@ -13,16 +12,48 @@ from        pfmisc._colors      import  Colors
 from        pfmisc              import  other
 from        pfmisc              import  error
 
-import      pudb
-
 import      threading
-from        tqdm                import  tqdm
-import      pathlib
+import      queue
+import      concurrent.futures
+import      multiprocessing
+import      inspect
+import      functools
+import      re
+import      fnmatch
+from        collections         import  deque
 
 try:
-    from    .                   import __name__, __version__
+    from    .                   import __name__
+    from    .filters            import nameFilter
+    from    .workers            import analysisWorker_init, analysisWorker_run
+    from    .journal            import journal
+    from    .index              import probeIndex, fileStat
+    from    .snapshot           import snapshot_write
+    from    .sqlexport          import sqlite_write
+    from    .progress           import progress
+    from    .treestore          import pathTable, pathDict
+    from    .stats              import dirStat, statsColumns, statsRows, \
+                                       sizeof_fmt, json_default
 except:
-    from    __init__            import __name__, __version__
+    from    __init__            import __name__
+    from    filters             import nameFilter
+    from    workers             import analysisWorker_init, analysisWorker_run
+    from    journal             import journal
+    from    index               import probeIndex, fileStat
+    from    snapshot            import snapshot_write
+    from    sqlexport           import sqlite_write
+    from    progress            import progress
+    from    treestore           import pathTable, pathDict
+    from    stats               import dirStat, statsColumns, statsRows, \
+                                       sizeof_fmt, json_default
+
+def tqdm(*args, **kwargs):
+    """
+    A tqdm progress bar. The tqdm package is only imported once a bar is
+    actually shown, which keeps it out of the startup of quiet runs.
+    """
+    from    tqdm                import  tqdm    as  progressBar
+    return progressBar(*args, **kwargs)
 
 class slog(object):
     """
@@ -180,7 +211,6 @@ class pftree(object):
         # Object desc block
         #
         self.__name__                   = __name__
-        self.str_version                = __version__
 
         # Object containing this class
         self.within                     = None
@@ -197,16 +227,39 @@ class pftree(object):
         self.d_outputTree               = {}
         self.str_outputLeafDir          = ''
         self.maxdepth                   = -1
+        self.str_probeEngine            = 'walk'
+        self.str_exclude                = ''
+        self.str_executor               = 'thread'
+        self.b_pipeline                 = False
+        self.inFlight                   = 0
+        self.str_journal                = ''
+        self.str_index                  = ''
+        self.str_snapshot               = ''
+        self.str_sqlite                 = ''
+        self.str_treeStore              = 'dict'
+        self.topN                       = 0
+        self.summarizeDepth             = -1
+        self.d_inputMtime               = {}
+        self.t_filterSpec               = ()
+        self.t_filters                  = ()
+        self.walkThreads                = 0
 
         # Flags
         self.b_persistAnalysisResults   = False
         self.b_relativeDir              = False
         self.b_stats                    = False
         self.b_statsReverse             = False
+        self.b_cumulative               = False
         self.b_jsonStats                = False
         self.b_json                     = False
+        self.b_ndjson                   = False
         self.b_test                     = False
         self.b_followLinks              = False
+        self.b_stream                   = False
+        self.b_resume                   = False
+        self.b_sqliteFiles              = False
+        self.b_incremental              = False
+        self.b_overwrite                = False
         self.str_sleepLength            = ''
         self.f_sleepLength              = 0.0
         self.testType                   = 0
@@ -214,7 +267,6 @@ class pftree(object):
         self.dp                         = None
         self.log                        = None
         self.tic_start                  = 0.0
-        self.pp                         = pprint.PrettyPrinter(indent=4)
         self.verbosityLevel             = 1
         self.debugLevel                 = 0
 
@@ -275,12 +327,39 @@ class pftree(object):
             if key == 'statsReverse':       self.b_statsReverse     = bool(value)
             if key == 'jsonStats':          self.b_jsonStats        = bool(value)
             if key == 'json':               self.b_json             = bool(value)
+            if key == 'ndjson':             self.b_ndjson           = bool(value)
             if key == 'followLinks':        self.b_followLinks      = bool(value)
             if key == 'test':               self.str_sleepLength    = value
             if key == 'outputLeafDir':      self.str_outputLeafDir  = value
+            if key == 'probeEngine':        self.str_probeEngine    = value
+            if key == 'walkThreads':        self.walkThreads        = int(value)
+            if key == 'stream':             self.b_stream           = bool(value)
+            if key == 'exclude':            self.str_exclude        = value
+            if key == 'executor':           self.str_executor       = value
+            if key == 'pipeline':           self.b_pipeline         = bool(value)
+            if key == 'inFlight':           self.inFlight           = int(value)
+            if key == 'journal':            self.str_journal        = value
+            if key == 'resume':             self.b_resume           = bool(value)
+            if key == 'incremental':        self.b_incremental      = bool(value)
+            if key == 'overwrite':          self.b_overwrite        = bool(value)
+            if key == 'index':              self.str_index          = value
+            if key == 'snapshot':           self.str_snapshot       = value
+            if key == 'sqlite':             self.str_sqlite         = value
+            if key == 'sqliteFiles':        self.b_sqliteFiles      = bool(value)
+            if key == 'treeStore':          self.str_treeStore      = value
+            if key == 'top':                self.topN               = int(value)
+            if key == 'cumulative':         self.b_cumulative       = bool(value)
+            if key == 'summarizeDepth':     self.summarizeDepth     = int(value)
 
         self.checkFor_tests()
 
+        if self.str_treeStore == 'compact':
+            # The three trees share one table of path components
+            table                       = pathTable()
+            self.d_inputTree            = pathDict(table)
+            self.d_inputTreeCallback    = pathDict(table)
+            self.d_outputTree           = pathDict(table)
+
         # Set logging
         self.dp                        = pfmisc.debug(
                                             verbosity   = self.verbosityLevel,
@@ -292,6 +371,50 @@ class pftree(object):
 
         if not len(self.str_inputDir): self.str_inputDir = '.'
 
+    def __getattr__(self, name):
+        """
+        Set up the attributes that are costly to import for, the pretty
+        printer ('pp') and the package version ('str_version'), on their
+        first access only. Being plain attributes once set, these can still
+        be assigned (by a subclass, say) as usual.
+        """
+        if name == 'pp':
+            import  pprint
+            self.pp             = pprint.PrettyPrinter(indent = 4)
+            return self.pp
+        if name == 'str_version':
+            try:
+                from    .       import __version__
+            except:
+                from    __init__ import __version__
+            self.str_version    = __version__
+            return self.str_version
+        raise AttributeError("'%s' object has no attribute '%s'" %
+                             (type(self).__name__, name))
+
+    def qprint_lazy(self, msg, *args, **kwargs):
+        """
+        A self.dp.qprint() that only builds its message if the message
+        level is within the verbosity. The <msg> is either a callable that
+        returns the message, or a %-format string for any <args>, e.g.
+
+            self.qprint_lazy('files in %s:\n%s', path,
+                             lambda: self.pp.pformat(l_file), level = 5)
+
+        where callables in the <args> are also only called at print time.
+        A message below the verbosity thus costs a single comparison, rather
+        than its formatting and the stack inspection of dp.qprint().
+        """
+        if kwargs.get('level', 1) > int(self.dp.verbosity): return
+        if callable(msg):
+            msg     = msg()
+        elif args:
+            msg     = msg % tuple(a() if callable(a) else a for a in args)
+        # Report the caller of this method (rather than this method) as
+        # the source of the message
+        kwargs['stackDepth']    = kwargs.get('stackDepth', 1) + 1
+        self.dp.qprint(msg, **kwargs)
+
     def toConsole(self) -> bool:
         """A simple check on CLI flag patterning to resolve whether or not
         to actually generate console output. This output needs to return
@@ -309,7 +432,7 @@ class pftree(object):
         b_toConsole :   bool    = True
 
         if self.verbosityLevel:
-            for noConsole in ['jsonStats', 'json']:
+            for noConsole in ['jsonStats', 'json', 'ndjson']:
                 if noConsole in self.args.keys():
                     b_toConsole     = b_toConsole and not self.args[noConsole]
         else:
@@ -352,128 +475,443 @@ class pftree(object):
             if num_sep + depth <= num_sep_this:
                 del dirs[:]
 
-    def tree_probe(self, **kwargs):
+    @staticmethod
+    def entry_stat(entry):
+        """Return a fileStat record for an os.DirEntry. Symbolic links
+        are resolved from the entry type alone (no syscall), all other
+        entries cost exactly one lstat.
         """
-        Perform an os walk down a file system tree, starting from
-        a **kwargs identified 'root', and return lists of files and
-        directories found.
+        try:
+            if entry.is_symlink():
+                return fileStat(0, 0.0, entry.inode(), True)
+            st  = entry.stat(follow_symlinks = False)
+            return fileStat(st.st_size, st.st_mtime, st.st_ino, False)
+        except OSError:
+            return fileStat(0, 0.0, 0, False)
 
-        kwargs:
-            root    = '/some/path'
+    @staticmethod
+    def dir_scan(root, fn_filter = None):
+        """List a single directory with os.scandir() and return
 
-        return {
-            'status':   True,
-            'l_dir':    l_dirs,
-            'l_files':  l_files
-        }
+                    (dirs, files, l_stat, l_dirLinks)
+
+        where <l_stat> holds the fileStat records aligned with <files> and
+        <l_dirLinks> lists the entries in <dirs> that are symbolic links.
+
+        If a <fn_filter(root, files)> is passed, it is applied to the file
+        names before any file is stat'ed, so that files that are filtered
+        out cost nothing beyond the directory listing.
+        """
+        dirs        = []
+        files       = []
+        l_entry     = []
+        l_dirLinks  = []
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    b_dir   = entry.is_dir()
+                except OSError:
+                    b_dir   = False
+                if b_dir:
+                    dirs.append(entry.name)
+                    if entry.is_symlink(): l_dirLinks.append(entry.name)
+                else:
+                    files.append(entry.name)
+                    l_entry.append(entry)
+        if fn_filter:
+            d_entry = dict(zip(files, l_entry))
+            files   = fn_filter(root, files)
+            l_entry = [d_entry[f] for f in files]
+        l_stat      = [pftree.entry_stat(entry) for entry in l_entry]
+        return dirs, files, l_stat, l_dirLinks
+
+    @staticmethod
+    def scandirlevel(path, depth = -1, **kwargs):
+        """Walk a tree like walklevel(), but using os.scandir() directly so
+        that the type and stat data of each entry is only ever fetched once.
+
+        Each iteration yields
+
+                    (root, dirs, files, l_stat)
+
+        where <l_stat> is a list of fileStat records aligned with <files>.
+        As with os.walk, the caller can prune <dirs> in place to prevent
+        descent. Unlike walklevel(), the <root> is only yielded once.
 
+        kwargs:
+            followlinks = True|False
+            prune       = <callable(root, dirname) that is True for dirs
+                           that should not be descended into>
+            filter      = <callable(root, files) that returns the files
+                           to keep, see dir_scan()>
+            scan        = <callable(root, filter) that stands in for
+                           dir_scan(), e.g. probeIndex.scan>
         """
+        b_followLinks   = False
+        fn_prune        = None
+        fn_filter       = None
+        fn_scan         = pftree.dir_scan
+        for k, v in kwargs.items():
+            if k == 'followlinks':  b_followLinks   = v
+            if k == 'prune':        fn_prune        = v
+            if k == 'filter':       fn_filter       = v
+            if k == 'scan':         fn_scan         = v
+
+        l_stack = [(path, 0)]
+        while l_stack:
+            root, level = l_stack.pop()
+            try:
+                dirs, files, l_stat, l_dirLinks = fn_scan(root, fn_filter)
+            except OSError:
+                continue
+            if fn_prune:
+                dirs[:] = [d for d in dirs if not fn_prune(root, d)]
+            yield root, dirs, files, l_stat
+            if depth < 0 or level < depth:
+                l_stack.extend( (os.path.join(root, d), level + 1)
+                                for d in reversed(dirs)
+                                if b_followLinks or d not in l_dirLinks)
 
-        def nextSpinner(b_cursorToNextLine):
-            """Provide a rotating spinner to indicate activity by using a closure.
+    @staticmethod
+    def scandirparallel(path, depth = -1, **kwargs):
+        """A multi-threaded variant of scandirlevel() for high latency
+        filesystems (NFS, Lustre) where the walk is bound by the round
+        trip of each directory listing rather than by bandwidth.
+
+        A pool of <workers> threads lists directories concurrently. Each
+        worker pushes the subdirectories it finds onto its own deque and
+        pops from it depth first; an idle worker steals the oldest (i.e.
+        shallowest, hence likely largest) pending directory from the other
+        workers.
+
+        Records are yielded as (root, dirs, files, l_stat) in completion
+        order, which is not deterministic. Since the workers descend on
+        their own, pruning <dirs> in the caller has no effect -- use the
+        'prune' callable instead, which is applied in the workers.
 
-            Returns:
-                inner : inner function
+        kwargs:
+            followlinks = True|False
+            workers     = <number of walker threads>
+            prune       = <callable(root, dirname) that is True for dirs
+                           that should not be descended into>
+            filter      = <callable(root, files) that returns the files
+                           to keep, see dir_scan()>
+            scan        = <callable(root, filter) that stands in for
+                           dir_scan(), e.g. probeIndex.scan>
+        """
+        b_followLinks   = False
+        workers         = 4
+        fn_prune        = None
+        fn_filter       = None
+        fn_scan         = pftree.dir_scan
+        for k, v in kwargs.items():
+            if k == 'followlinks':  b_followLinks   = v
+            if k == 'workers':      workers         = max(1, int(v))
+            if k == 'prune':        fn_prune        = v
+            if k == 'filter':       fn_filter       = v
+            if k == 'scan':         fn_scan         = v
+
+        l_deque     = [deque() for w in range(workers)]
+        q_results   = queue.Queue()
+        cv_pending  = threading.Condition()
+        ev_stop     = threading.Event()
+        pending     = 1
+        l_deque[0].append((path, 0))
+
+        def work_get(w):
             """
-            spinner = '\\|/-'
-            pos     = 0
-            def inner(b_cursorToNextLine):
-                nonlocal pos, spinner
-                if pos>=len(spinner): pos = 0
-                if self.toConsole():
-                    self.dp.qprint('Probing filesystem... {}'.format(spinner[pos]), end = '')
-                    if not b_cursorToNextLine:
-                        self.dp.qprint('\r', end = '', syslog = self.args['syslog'])
-                    else:
-                        self.dp.qprint('\n', end = '', syslog = self.args['syslog'])
-                pos += 1
-                return inner
-            return inner
-
-        def path_shorten(str_path, length = 80) -> str:
-            """Shorten a Path string
-
-            Returns:
-                string : a shortened path
+            Pop from our own deque, else steal from another worker.
             """
-            if length < 0:
-                length = os.get_terminal_size().columns + length
-            if len(str_path) > length:
-                l_parts = list(pathlib.PurePath(str_path).parts)
-                l_copy  = l_parts.copy()
-                max     = len(l_parts)
-                offset  = -1
-                center  = max // 2
-                while len(str_path) > length:
-                    offset += 1
-                    l_shorten = [i % (max + 1) for i in range(  center - offset,
-                                                    center + offset + 1)]
-                    for prt in l_shorten: l_copy[prt] = '...'
-                    str_path    = str(pathlib.PurePath(*l_copy))
-            return str_path
-
-        def elements_flash(l_el, debugLevel):
+            try:
+                return l_deque[w].pop()
+            except IndexError:
+                pass
+            for offset in range(1, workers):
+                try:
+                    return l_deque[(w + offset) % workers].popleft()
+                except IndexError:
+                    pass
+            return None
+
+        def worker(w):
+            nonlocal pending
+            while not ev_stop.is_set():
+                item    = work_get(w)
+                if item is None:
+                    with cv_pending:
+                        if not pending: return
+                        cv_pending.wait(0.01)
+                    continue
+                root, level = item
+                try:
+                    dirs, files, l_stat, l_dirLinks = fn_scan(root, fn_filter)
+                    if fn_prune:
+                        dirs[:] = [d for d in dirs if not fn_prune(root, d)]
+                    if depth < 0 or level < depth:
+                        l_sub   = [ (os.path.join(root, d), level + 1)
+                                    for d in reversed(dirs)
+                                    if b_followLinks or d not in l_dirLinks]
+                        if l_sub:
+                            with cv_pending:
+                                pending += len(l_sub)
+                                cv_pending.notify_all()
+                            l_deque[w].extend(l_sub)
+                    q_results.put((root, dirs, files, l_stat))
+                except OSError:
+                    pass
+                except Exception as e:
+                    q_results.put(e)
+                with cv_pending:
+                    pending -= 1
+                    if not pending:
+                        cv_pending.notify_all()
+                        q_results.put(None)
+
+        l_thread    = [threading.Thread(target  = worker,
+                                        args    = (w,),
+                                        name    = 'walkThread-%02d' % w,
+                                        daemon  = True)
+                        for w in range(workers)]
+        for t in l_thread: t.start()
+        try:
+            while True:
+                record  = q_results.get()
+                if record is None: break
+                if isinstance(record, Exception): raise record
+                yield record
+        finally:
+            ev_stop.set()
+
+    @staticmethod
+    def exclude_compile(str_exclude):
+        """Compile a comma separated list of exclude rules into a single
+        prune callable for the walkers, or None if there are no rules.
+
+        Each rule is either
+
+            * a plain directory name, e.g. '.git' (exact match);
+            * a glob, e.g. 'scratch*' (any rule containing '*?[');
+            * a regular expression prefixed with 're:', e.g. 're:^tmp[0-9]+$'.
+
+        Globs and regular expressions are matched against the directory
+        name, unless they contain a path separator, in which case they
+        are matched against the full directory path. All the rules are
+        folded into one set lookup and (at most) two compiled regexes.
+        """
+        s_names     = set()
+        l_name      = []
+        l_path      = []
+        for str_rule in str_exclude.split(','):
+            str_rule = str_rule.strip()
+            if not len(str_rule): continue
+            if str_rule.startswith('re:'):
+                str_regex   = str_rule[3:]
+            elif any(c in str_rule for c in '*?['):
+                str_regex   = '^' + fnmatch.translate(str_rule)
+            else:
+                s_names.add(str_rule)
+                continue
+            if os.sep in str_rule:
+                l_path.append('(?:%s)' % str_regex)
+            else:
+                l_name.append('(?:%s)' % str_regex)
+        if not (s_names or l_name or l_path):
+            return None
+        re_name     = re.compile('|'.join(l_name)) if l_name else None
+        re_path     = re.compile('|'.join(l_path)) if l_path else None
+
+        def fn_prune(root, str_dir):
+            if str_dir in s_names:
+                return True
+            if re_name and re_name.search(str_dir):
+                return True
+            if re_path and re_path.search(os.path.join(root, str_dir)):
+                return True
+            return False
+        return fn_prune
+
+    def tree_walk(self, **kwargs):
+        """
+        A generator that walks down a file system tree, starting from
+        a **kwargs identified 'root', and yields one record per directory
+        as it is found:
+
+                    (str_dir, l_files, l_stat)
+
+        where <l_files> is the list of file names (without path) in
+        <str_dir> and <l_stat> the aligned list of fileStat records (or
+        None if the probe engine does not capture stat data). No per-file
+        full path string is ever built.
+
+        Directories matching the '--exclude' rules are pruned before
+        descent, so that excluded subtrees are never listed or stat'ed.
+        The '--inputFile' and '--fileFilter'/'--dirFilter' filters (see
+        FS_filter()) are applied to each directory as it is listed, and
+        before the scandir engines stat any file.
+
+        This is the core of tree_probe(), and can also be passed directly
+        to tree_construct(probeStream = ...) so that directories are
+        constructed (and sized) while the walk is still running, without
+        ever materializing the probe lists.
+
+        If a probe index file is set ('--index'), the walk uses the scandir
+        engines and reuses the index entry of every directory whose mtime
+        has not changed since the last probe (see index.py). The index is
+        saved once the walk completes.
+
+        With a verbosity of 2 or more, the walk is reported on the console
+        by a rate limited progress reporter (see progress.py): the walk only
+        counts the directories and files it finds, and the reporter renders
+        these counts at a fixed rate, whatever the size of the tree.
+
+        kwargs:
+            root    = '/some/path'
+        """
+
+        def files_filter(root, l_files) -> list:
             """
-            Flash elements in the passed list at the debugLevel
+            Reduce the files in <root> to those hit by the '--inputFile'
+            and the '--fileFilter'/'--dirFilter' filters.
             """
-            if self.toConsole():
-                for el in l_el:
-                    self.dp.qprint('%s (%d)\033[K\r' % \
-                            (path_shorten(el, - len(str(len(l_el))) - 4), len(l_el)),
-                            level   = debugLevel,
-                            end     = '',
-                            syslog  = self.args['syslog'])
-
+            if len(self.str_inputFile):
+                # The <inputFile> is a substring test on the full path. Unless
+                # it spans a path separator, it either hits the <root> (and
+                # hence every file) or must hit the file name itself.
+                if os.sep in self.str_inputFile:
+                    l_files = [y for y in l_files
+                                if self.str_inputFile in root + '/' + y]
+                elif self.str_inputFile not in root:
+                    l_files = [y for y in l_files if self.str_inputFile in y]
+            if b_FSfilter and len(l_files):
+                l_files = self.FS_filter((root.rstrip(os.sep) or root,
+                                          l_files))['l_file'] or []
+            return l_files
 
         str_topDir          = "."
+        l_statHere          = None
+        b_scandir           = self.str_probeEngine == 'scandir' or \
+                              self.walkThreads > 0 or \
+                              len(self.str_index) > 0
+        index_probe         = None
+        fn_scan             = pftree.dir_scan
+        reporter            = None
+
+        for k, v in kwargs.items():
+            if k == 'root':  str_topDir  = v
+
+        if int(self.verbosityLevel) >= 2 and self.toConsole():
+            reporter        = progress(' Probing filesystem').start()
+        fn_prune            = pftree.exclude_compile(self.str_exclude)
+        b_FSfilter          = len(self.args['fileFilter']) or \
+                              len(self.args['dirFilter'])
+        fn_filter           = None
+        if b_FSfilter or len(self.str_inputFile): fn_filter = files_filter
+        if len(self.str_index):
+            index_probe     = probeIndex(self.str_index, (
+                                self.args['fileFilter'], self.args['fileFilterLogic'],
+                                self.args['dirFilter'],  self.args['dirFilterLogic'],
+                                self.str_inputFile))
+            index_probe.load()
+            fn_scan         = lambda root, fn_filter: \
+                                index_probe.scan(root, fn_filter, pftree.dir_scan)
+        index:int       = 0
+        if self.walkThreads > 0:
+            walker  = pftree.scandirparallel(str_topDir,
+                                          self.maxdepth,
+                                          followlinks = self.b_followLinks,
+                                          workers     = self.walkThreads,
+                                          prune       = fn_prune,
+                                          filter      = fn_filter,
+                                          scan        = fn_scan)
+        elif b_scandir:
+            walker  = pftree.scandirlevel(str_topDir,
+                                          self.maxdepth,
+                                          followlinks = self.b_followLinks,
+                                          prune       = fn_prune,
+                                          filter      = fn_filter,
+                                          scan        = fn_scan)
+        else:
+            walker  = (record + (None,) for record in
+                        pftree.walklevel(str_topDir,
+                                         self.maxdepth,
+                                         followlinks = self.b_followLinks))
+        try:
+            for root, dirs, files, l_statHere in walker:
+                if fn_prune and not b_scandir:
+                    dirs[:] = [d for d in dirs if not fn_prune(root, d)]
+                if index or b_scandir:
+                    l_filesHere = files
+                else:
+                    l_filesHere = dirs
+                if fn_filter and not b_scandir:
+                    l_filesHere = fn_filter(root, l_filesHere)
+                if reporter:
+                    reporter.dirs      += 1
+                    reporter.files     += len(l_filesHere)
+                    reporter.str_path   = root
+                index += 1
+                yield root, l_filesHere, l_statHere
+        finally:
+            if reporter: reporter.stop()
+        if index_probe:
+            index_probe.save()
+            self.qprint_lazy('Probe index: %d directories reused, %d listed',
+                             index_probe.hits, index_probe.misses, level = 2)
+        if reporter:
+            self.dp.qprint('Probing complete!', level = 1)
+
+    def tree_probe(self, **kwargs):
+        """
+        Perform an os walk down a file system tree, starting from
+        a **kwargs identified 'root', and return lists of files and
+        directories found.
+
+        kwargs:
+            root        = '/some/path'
+            fullPaths   = True|False
+
+        return {
+            'status':       True,
+            'l_dir':        l_dirs,
+            'l_files':      l_files
+        }
+
+        By default, each list in <l_files> holds the files with their full
+        path. If 'fullPaths = False', the file names are returned as is,
+        aligned with the directories in <l_dir>, which saves building (and
+        later splitting) a full path string for each file. Such a return is
+        marked with an extra 'fullPaths': False.
+
+        If the 'scandir' probe engine is selected, the return also carries
+        an 'l_stat' list of fileStat record lists, aligned with 'l_files'.
+        A non-zero number of 'walkThreads' implies the scandir engine, with
+        the directories listed concurrently by scandirparallel().
+
+        """
         l_dirs              = []
         l_files             = []
+        l_stats             = []
         b_status            = False
-        str_path            = ''
-        l_dirsHere          = []
-        l_filesHere         = []
-        b_cursorToNextLine  = False
+        b_fullPaths         = True
 
         for k, v in kwargs.items():
-            if k == 'root':  str_topDir  = v
+            if k == 'fullPaths':    b_fullPaths = bool(v)
 
-        if int(self.verbosityLevel) >= 2:
-            b_cursorToNextLine = True
-        spinner             = nextSpinner(b_cursorToNextLine)
-        index:int       = 0
-        for root, dirs, files in pftree.walklevel(str_topDir,
-                                                  self.maxdepth,
-                                                  followlinks = self.b_followLinks):
-            b_status = True
-            if self.verbosityLevel >= 2: spinner(b_cursorToNextLine)
-            str_path = root.split(os.sep)
+        for root, l_filesHere, l_statHere in self.tree_walk(**kwargs):
+            b_status    = True
             l_dirs.append(root)
-            if self.verbosityLevel >= 2: elements_flash(l_dirs, 2)
-            if index:
-                l_filesHere = [root + '/' + y for y in files]
-            else:
-                l_filesHere = [root + '/' + y for y in dirs]
-            if len(self.str_inputFile):
-                l_hit = [s for s in l_filesHere if self.str_inputFile in s]
-                if l_hit:
-                    l_filesHere = l_hit
-                else:
-                    l_filesHere = []
+            if b_fullPaths:
+                l_filesHere = [root + '/' + y for y in l_filesHere]
             l_files.append(l_filesHere)
-            if self.verbosityLevel >= 3: elements_flash(l_filesHere, 3)
-            if self.toConsole() and self.verbosityLevel >=2:
-                self.dp.qprint("\033[A" * 1,
-                                end     = '',
-                                syslog  = self.args['syslog'],
-                                level   = 2 )
-            index += 1
-        if self.toConsole() and self.verbosityLevel >= 2:
-            self.dp.qprint('Probing complete!              ', level = 1)
-        return {
-            'status':   b_status,
-            'l_dir':    l_dirs,
-            'l_files':  l_files
+            if l_statHere is not None: l_stats.append(l_statHere)
+        d_ret   = {
+            'status':       b_status,
+            'l_dir':        l_dirs,
+            'l_files':      l_files
         }
+        if not b_fullPaths: d_ret['fullPaths'] = False
+        if len(l_stats): d_ret['l_stat'] = l_stats
+        return d_ret
 
     def tree_construct(self, *args, **kwargs):
         """
@@ -481,37 +919,79 @@ class pftree(object):
         and builds the input/output dictionary structures.
 
         Optionally execute a constructCallback function, and return
-        results
+        results. If the probe carried stat data ('l_stat'), the list of
+        fileStat records for each directory is passed to the callback
+        in kwargs['l_stat'].
+
+        Alternatively, a record generator from tree_walk() can be passed
+        as 'probeStream', in which case each directory is constructed as
+        soon as it has been walked and the probe lists are never built.
+
+        Probe records that carry their directory (a probe stream, or a
+        tree_probe(fullPaths = False)) are used directly. Only a list of
+        full path files needs to be split back into dirname/basename.
+
+        If a 'recordCallback' is passed, it is called as each directory is
+        constructed, with the path, the file list and the constructCallback
+        result (or None) of the directory.
         """
         l_files                 = []
+        l_stat                  = []
+        l_dir                   = []
         d_constructCallback     = {}
         fn_constructCallback    = None
+        fn_recordCallback       = None
         d_probe                 = {}
+        probeStream             = None
         l_range                 = []
 
         for k, v in kwargs.items():
             if k == 'l_files':           l_files                 = v
             if k == 'constructCallback': fn_constructCallback    = v
             if k == 'd_probe':           d_probe                 = v
-
-        if d_probe: l_files     = d_probe['l_files']
+            if k == 'probeStream':       probeStream             = v
+            if k == 'recordCallback':    fn_recordCallback       = v
+
+        if d_probe:
+            l_files     = d_probe['l_files']
+            if 'l_stat' in d_probe: l_stat = d_probe['l_stat']
+            if not d_probe.get('fullPaths', True): l_dir = d_probe['l_dir']
+        if probeStream is not None:
+            records     = probeStream
+        elif l_dir:
+            records     = ( (str_dir, l_series, l_stat[n] if l_stat else None)
+                            for n, (str_dir, l_series) in enumerate(zip(l_dir, l_files)))
+        else:
+            records     = ( (None, l_series, l_stat[n] if l_stat else None)
+                            for n, l_series in enumerate(l_files))
         index   = 0
         total   = len(l_files)
         if int(self.verbosityLevel) and self.toConsole():
-            l_range     = tqdm(l_files, desc = ' Constructing tree')
+            l_range     = tqdm(records, desc = ' Constructing tree',
+                                total = None if probeStream is not None else total)
         else:
-            l_range     = l_files
-        for l_series in l_range:
+            l_range     = records
+        for str_dir, l_series, l_statHere in l_range:
             if len(l_series):
-                str_path    = os.path.dirname(l_series[0])
-                l_series    = [ os.path.basename(i) for i in l_series]
+                if str_dir is None:
+                    str_path    = os.path.dirname(l_series[0])
+                    l_series    = [ os.path.basename(i) for i in l_series]
+                else:
+                    str_path    = str_dir.rstrip(os.sep) or str_dir
                 # self.simpleProgress_show(index, total)
                 self.d_inputTree[str_path]  = l_series
+                if self.b_incremental and l_statHere:
+                    self.d_inputMtime[str_path] = max(s.mtime for s in l_statHere)
                 if fn_constructCallback:
                     kwargs['path']          = str_path
+                    if l_statHere is not None:
+                        kwargs['l_stat']    = l_statHere
                     d_constructCallback     = fn_constructCallback(l_series, **kwargs)
                     self.d_inputTreeCallback[str_path]  = d_constructCallback
                 self.d_outputTree[str_path] = ""
+                if fn_recordCallback:
+                    fn_recordCallback(str_path, l_series,
+                                      d_constructCallback if fn_constructCallback else None)
                 index += 1
         return {
             'status':                   True,
@@ -559,55 +1039,33 @@ class pftree(object):
         will reduce the space of files to process to ONLY files that have
         an ancestor directory of "100307" OR "100556" AND that contain either
         the string "png" OR "jpg" in their file names.
+
+        Besides plain substrings, filter tokens can also be globs ("*.dcm"),
+        regular expressions ("re:^IM-[0-9]+") or be negated ("!json"). The
+        filter expressions are compiled only once (see filters.nameFilter)
+        and each file name is then evaluated in a single pass.
         """
 
         b_status    : bool      = True
         l_file      : list      = []
-        l_dirHits   : list      = []
-        l_dir       : list      = []
         str_path    : str       = at_data[0]
         al_file     : list      = at_data[1]
 
-        if len(self.args['fileFilter']):
-            if self.args['fileFilterLogic'].upper() == 'OR':
-                al_file     = [x                                            \
-                            for y in self.args['fileFilter'].split(',')     \
-                                for x in al_file if y in x]
-            else:
-                for y in self.args['fileFilter'].split(','):
-                    al_file = [x for x in al_file if y in x]
-
-        if len(self.args['dirFilter']):
-            l_dirHits   = [str_path                                         \
-                            for y in self.args['dirFilter'].split(',')      \
-                                if y in str_path]
-            if self.args['dirFilterLogic'].upper()  == 'AND':
-                if len(l_dirHits) == len(self.args['dirFilter'].split(',')):
-                    for y in self.args['dirFilter'].split(','):
-                        l_dirHits = [x for x in l_dirHits if y in x]
-                else:
-                    l_dirHits = []
-            if len(l_dirHits):
-                # Remove any duplicates in the l_dirHits: duplicates can occur
-                # if the tokens in the filter expression map more than once
-                # into the leaf node in the <str_path>, as a path that is
-                #
-                #               /some/dir/in/the/space/1234567
-                #
-                # and a search filter on the dirspace of "123,567"
-                [l_dir.append(x) for x in l_dirHits if x not in l_dir]
-            else:
-                # If no dir hits for this dir, then we zero out the
-                # file filter
-                al_file = []
+        fileFilter, dirFilter   = self.filters_get()
+        if dirFilter and not dirFilter.match(str_path):
+            # If no dir hits for this dir, then we zero out the
+            # file filter
+            al_file     = []
+        elif fileFilter:
+            al_file     = fileFilter(al_file)
 
         if len(al_file):
             al_file.sort()
             l_file      = al_file
             b_status    = True
         else:
-            self.dp.qprint( "No valid files to analyze found in path %s!" %
-                            str_path, comms = 'warn', level = 5)
+            self.qprint_lazy("No valid files to analyze found in path %s!",
+                             str_path, comms = 'warn', level = 5)
             l_file      = None
             b_status    = False
         return {
@@ -615,10 +1073,28 @@ class pftree(object):
             'l_file':   l_file
         }
 
+    def filters_get(self) -> tuple:
+        """
+        Return the (fileFilter, dirFilter) nameFilter pair compiled from
+        the CLI filter expressions. These are compiled on first use, and
+        only recompiled should the expressions change.
+        """
+        t_spec      = ( self.args['fileFilter'], self.args['fileFilterLogic'],
+                        self.args['dirFilter'],  self.args['dirFilterLogic'])
+        if self.t_filterSpec != t_spec:
+            self.t_filters      = ( nameFilter(t_spec[0], t_spec[1]),
+                                    nameFilter(t_spec[2], t_spec[3]))
+            self.t_filterSpec   = t_spec
+        return self.t_filters
+
     def filterFileHitList(self) -> dict:
         """
         Entry point for filtering the file filter list
         at each directory node.
+
+        Note that run() no longer calls this, since the filters are
+        applied during the walk. It remains for callers that construct
+        a tree themselves and then want to filter it.
         """
         d_filterFileHitList = self.tree_process(
                         inputReadCallback       = None,
@@ -635,27 +1111,52 @@ class pftree(object):
 
         return d_filterFileHitList
 
+    def filterHits_summarize(self) -> dict:
+        """
+        Summarize the file filter hits of a tree that was filtered during
+        the probe, in the terms of a filterFileHitList() return. The status
+        is False if the filters left no files at all.
+        """
+        filesHit    = sum(len(l_file) for l_file in self.d_inputTree.values())
+        return {
+            'status':               filesHit > 0,
+            'processType':          'Probe filtered',
+            'fileSetsProcessed':    len(self.d_inputTree),
+            'filesAnalyzed':        filesHit
+        }
+
     @staticmethod
     def sizeof_fmt(num, suffix='B'):
-        for unit in ['','k','M','G','T','P','E','Z']:
-            if abs(num) < 1024.0:
-                return "%3.1f%s%s" % (num, unit, suffix)
-            num /= 1024.0
-        return "%.1f%s%s" % (num, 'Yi', suffix)
+        return sizeof_fmt(num, suffix)
 
     @staticmethod
     def dirsize_get(l_filesWithoutPath, **kwargs):
         """
         Sample callback that determines a directory size.
+
+        If the probe already captured the stat data of each file (passed
+        in kwargs['l_stat']), the size is simply summed from these records
+        and the filesystem is not touched again.
+
+        The size is returned as a dirStat record, which reads like the
+        dictionary
+
+            {'status': True, 'diskUsage_raw': size, 'diskUsage_human': str}
+
+        but only stores the raw size, and formats the human readable size
+        on demand (see stats.py).
         """
 
         str_path    = ""
+        l_stat      = None
         for k,v in kwargs.items():
-            if k == 'path': str_path = v
+            if k == 'path':     str_path    = v
+            if k == 'l_stat':   l_stat      = v
 
-        d_ret   = {}
-        l_size  = []
         size    = 0
+        if l_stat is not None:
+            size    = sum(s.size for s in l_stat)
+            l_filesWithoutPath  = []
         for f in l_filesWithoutPath:
             str_f   = '%s/%s' % (str_path, f)
             if not os.path.islink(str_f):
@@ -663,14 +1164,225 @@ class pftree(object):
                     size += os.path.getsize(str_f)
                 except:
                     pass
-        str_size    = pftree.sizeof_fmt(size)
+        return dirStat(size)
+
 
+    @staticmethod
+    def tree_liveBranches(d_tree, d_work = None):
+        """
+        Return a copy of the <d_tree>, of the same store type, without the
+        branches whose value is empty/None -- or, if <d_work> is given,
+        without only those of its branches that are.
+        """
+        if d_work is not None:
+            d_live  = d_tree.copy()
+            for path in d_work:
+                if path in d_live and not d_live[path]: del d_live[path]
+            return d_live
+        if isinstance(d_tree, pathDict):
+            return d_tree.filtered(bool)
+        return { k : v for k, v in d_tree.items() if v}
+
+    def processedTree_set(self, d_tree, d_work):
+        """
+        Set the d_inputTree (and a copy of it as the d_outputTree) to the
+        <d_tree> a tree_process*() run over <d_work> produced, less its
+        dead branches.
+
+        Only the directories of <d_work> were processed, and so only they
+        can be dead: those that a resumed run (see journal_open()) or an
+        incremental one (see incremental_filter()) skipped keep their
+        input file lists, so that both trees still hold every directory
+        of the d_inputTreeCallback.
+        """
+        b_skipped   = len(d_work) < len(self.d_inputTree)
+        if b_skipped:
+            for path, l_file in self.d_inputTree.items():
+                if path not in d_work: d_tree[path] = l_file
+        d_tree              = self.tree_liveBranches(d_tree,
+                                                     d_work if b_skipped else None)
+        self.d_inputTree    = d_tree
+        self.d_outputTree   = self.d_inputTree.copy()
+        return d_tree
+
+    def outputLeaf_resolve(self, path) -> str:
+        """
+        Apply the <outputLeafDir> formatting spec (if any) to the leaf
+        directory of <path>, returning the path (relative to the
+        <outputDir>) that corresponds to the input <path>.
+        """
+        if len(self.str_outputLeafDir):
+            (dirname, basename) = os.path.split(path)
+            str_format  = '\'%s\'' % self.str_outputLeafDir
+            new_basename = str_format + ' % basename'
+            str_eval    = eval(new_basename)
+            path        = '%s/%s' % (dirname, str_eval)
+        return path
+
+    def output_upToDate(self, path) -> bool:
+        """
+        A make-style check of whether the output leaf of the input <path>
+        is up to date, i.e. whether the output leaf directory holds files,
+        none of which is older than the <path> directory itself or any of
+        its input files. Checking the directory mtime means that files
+        that were added, removed or renamed in the input also count as
+        a change.
+
+        The input file mtimes are taken from the probe where the scandir
+        engines captured them (see tree_construct()), and stat'ed here
+        otherwise.
+        """
+        str_outputPath  = '%s/%s' % (self.str_outputDir, self.outputLeaf_resolve(path))
+        try:
+            l_outputMtime   = [ entry.stat().st_mtime
+                                for entry in os.scandir(str_outputPath)
+                                if entry.is_file() ]
+            if not l_outputMtime: return False
+            f_inputMtime    = os.stat(path).st_mtime
+            if path in self.d_inputMtime:
+                f_inputMtime    = max(f_inputMtime, self.d_inputMtime[path])
+            else:
+                for str_file in self.d_inputTree[path]:
+                    f_inputMtime    = max(f_inputMtime,
+                                          os.stat(os.path.join(path, str_file)).st_mtime)
+        except (OSError, TypeError):
+            return False
+        return f_inputMtime <= min(l_outputMtime)
+
+    def incremental_filter(self, d_work) -> dict:
+        """
+        In incremental mode (and unless overwriting), drop from <d_work>
+        the directories whose outputs are up to date, so that a rerun
+        over a mostly unchanged tree only processes what has changed.
+        The dropped directories are not dead branches: processedTree_set()
+        keeps them in the trees.
+        """
+        fileSetsUpToDate    = 0
+        if self.b_incremental and not self.b_overwrite:
+            d_stale             = { k : v for k, v in d_work.items()
+                                            if not self.output_upToDate(k) }
+            fileSetsUpToDate    = len(d_work) - len(d_stale)
+            d_work              = d_stale
+            if self.toConsole():
+                self.dp.qprint(
+                    "Incremental: skipping %d up to date directories" % fileSetsUpToDate,
+                    level = 1
+                )
+        return {
+            'status':           True,
+            'd_work':           d_work,
+            'fileSetsUpToDate': fileSetsUpToDate
+        }
+
+    def journal_open(self, str_journal, l_stages) -> dict:
+        """
+        Open the checkpoint <str_journal> (if any) for a tree_process*()
+        run of the <l_stages>, and return the journal along with the part
+        of the d_inputTree that is still to be processed -- which, when
+        resuming, excludes the directories the journal records as done.
+        """
+        jrnl            = None
+        d_work          = self.d_inputTree
+        fileSetsSkipped = 0
+        if len(str_journal) and len(l_stages):
+            jrnl        = journal(str_journal)
+            if self.b_resume:
+                s_done          = jrnl.load()
+                d_work          = { k : v for k, v in self.d_inputTree.items()
+                                            if k not in s_done }
+                fileSetsSkipped = len(self.d_inputTree) - len(d_work)
+                if self.toConsole():
+                    self.dp.qprint(
+                        "Resuming from %s: skipping %d completed directories" %
+                        (str_journal, fileSetsSkipped),
+                        level = 1
+                    )
+            jrnl.open(l_stages)
         return {
             'status':           True,
-            'diskUsage_raw':    size,
-            'diskUsage_human':  str_size
+            'journal':          jrnl,
+            'd_work':           d_work,
+            'fileSetsSkipped':  fileSetsSkipped
+        }
+
+    def callbackStatus_check(self, d_ret, str_callback):
+        """
+        A tree_process*() callback must return a dictionary with a
+        'status'; one that does not is fatal.
+        """
+        if 'status' not in d_ret.keys():
+            self.dp.qprint(
+                "The %s callback did not return a 'status' value!" % str_callback,
+                comms = 'error',
+                level = 0
+            )
+            error.fatal(self, str_callback,  drawBox = True)
+
+    def inputSet_store(self, path, d_read, d_tree, jrnl = None) -> dict:
+        """
+        Store the <d_read> result of the inputReadCallback at <path> in
+        the <d_tree>, journal it, and return its status and files read.
+        """
+        self.callbackStatus_check(d_read, 'inputReadCallback')
+        d_tree[path]    = d_read
+        if jrnl: jrnl.record(path, 'read', d_read['status'])
+        return {
+            'status':       d_read['status'],
+            'filesRead':    d_read.get('filesRead', 0)
+        }
+
+    def analysis_store(self, path, d_analysis, d_tree,
+                       str_applyKey = '', jrnl = None) -> dict:
+        """
+        Store the <d_analysis> result of the analysisCallback at <path> in
+        the <d_tree> (only its <str_applyKey> entry, if given), journal
+        it, and return its status and files analyzed. A failed analysis
+        stores a None, which marks the branch as dead.
+        """
+        self.callbackStatus_check(d_analysis, 'analysisCallback')
+        filesAnalyzed   = 0
+        if d_analysis['status']:
+            if len(str_applyKey):
+                d_tree[path]    = d_analysis[str_applyKey]
+            else:
+                d_tree[path]    = d_analysis
+            if 'filesAnalyzed' in d_analysis.keys():
+                filesAnalyzed   = d_analysis['filesAnalyzed']
+            elif 'l_file' in d_analysis.keys():
+                filesAnalyzed   = len(d_analysis['l_file'])
+        else:
+            d_tree[path]        = None
+        if jrnl: jrnl.record(path, 'analyze', d_analysis['status'])
+        return {
+            'status':           d_analysis['status'],
+            'filesAnalyzed':    filesAnalyzed
+        }
+
+    def outputSet_store(self, path, d_output, d_tree,
+                        b_persistAnalysisResults = False, jrnl = None) -> dict:
+        """
+        Store the <d_output> result of the outputWriteCallback for the
+        input <path> at its output leaf in the <d_tree> (unless the
+        analysis results persist there), journal it, and return its
+        status and files saved.
+        """
+        self.callbackStatus_check(d_output, 'outputWriteCallback')
+        if not b_persistAnalysisResults:
+            d_tree[self.outputLeaf_resolve(path)]   = d_output
+        if jrnl: jrnl.record(path, 'write', d_output['status'])
+        return {
+            'status':       d_output['status'],
+            'filesSaved':   d_output.get('filesSaved', 0)
         }
 
+    @staticmethod
+    def stagesStatus_determine(*l_stage) -> bool:
+        """
+        The status of a tree_process*() run over the (callback, d_ret)
+        pairs of its read/analysis/write stages: the AND of the status
+        of each stage that has a callback.
+        """
+        return all(d_ret.get('status', True) for fn, d_ret in l_stage if fn)
 
     def tree_process(self, *args, **kwargs):
         """
@@ -695,11 +1407,47 @@ class pftree(object):
         "path" call the inputRead/dataAnalysis/outputWrite callbacks in order.
 
         If this pftree object is initialized as multi-threaded, only the
-        dataAnalysis callback is actually threaded. The read and write
+        dataAnalysis callback is actually threaded. With
+
+            kwargs:     executor    = 'process'
+
+        (or the '--executor process' CLI) the dataAnalysis callback is run
+        on a pool of processes instead, which suits CPU bound analyses that
+        would otherwise be serialized by the GIL. In that case the callback
+        results must be picklable, and any side effects of the callback on
+        this object are not seen by the parent process.
+
+        Finally, with
+
+            kwargs:     pipeline    = True
+
+        (or the '--pipeline' CLI) the read, analysis and write callbacks
+        run concurrently as stages of a pipeline, with at most
+        self.inFlight directories in flight between the read and write
+        stages (see loop_pipelined()). The read and write
         file IO callbacks are run sequentially for efficiency (threaded
         file IO is horribly inefficient and actually degrades in linear
         proportion to the number of threads).
 
+        If a journal file is set (the '--journal <file>' CLI or
+
+            kwargs:     journal     = <file>
+
+        ) each directory is appended to this journal as its read/analysis/
+        write chain completes, along with the status of each stage. With
+        self.b_resume (or '--resume') the journal is first reloaded and all
+        the directories it records as completed are skipped, so that a
+        restarted run only does the work that remains (see journal.py).
+        Skipped directories keep their input file lists in the resulting
+        trees (see processedTree_set()).
+
+        In incremental mode (self.b_incremental, or the '--incremental'
+        CLI) and unless self.b_overwrite is set, the directories whose
+        output leaf is up to date with respect to their input files (see
+        output_upToDate()) skip the whole read/analysis/write chain, and
+        keep their input file lists in the resulting trees, as resumed
+        directories do.
+
         The results of the analysis are typically stored in the corresponding
         path in the <outputTree> (unless 'persistAnalysisResults' == False);
         however, results can also be applied to the <inputTree> (see below).
@@ -774,29 +1522,14 @@ class pftree(object):
         filesAnalyzed               = 0
         filesSaved                  = 0
         str_desc                    = ""
-
-        def thread_batch(l_threadFunc, outerLoop, innerLoop, offset):
-            """
-            Fire up a set of threads and wait for them to join
-            the main execution flow
-            """
-            start   = 0
-            join    = 0
-            il      = lambda f, i, o, l : f + i + o * l
-            for t_o in range(0, outerLoop):
-                for t_i in range(0, innerLoop):
-                    idx = il(offset, t_i, t_o, innerLoop)
-                    l_threadFunc[idx].start()
-                    start += 1
-                    # self.dp.qprint('Started thread %d' % start)
-
-                for t_i in range(0, innerLoop):
-                    idx = il(offset, t_i, t_o, innerLoop)
-                    l_threadFunc[idx].join()
-                    join += 1
-                    # self.dp.qprint('Join set on thread %d' % join)
-
-            return start
+        str_executor                = self.str_executor
+        b_pipeline                  = self.b_pipeline
+        str_journal                 = self.str_journal
+        jrnl                        = None
+        d_work                      = self.d_inputTree
+        fileSetsSkipped             = 0
+        fileSetsUpToDate            = 0
+        lock_count                  = threading.Lock()
 
         def inputSet_read(path, data):
             """
@@ -804,54 +1537,32 @@ class pftree(object):
             from specific "leaf" nodes in the <inputDir>.
             """
             nonlocal    filesRead
-            nonlocal    index
             nonlocal    d_tree
             nonlocal    fn_inputReadCallback
 
-            d_read = fn_inputReadCallback((path, data), **kwargs)
-
-            if 'status' in d_read.keys():
-                d_tree[path]    = d_read
-                if 'filesRead' in d_read.keys():
-                    filesRead   += d_read['filesRead']
-            else:
-                self.dp.qprint(
-                    "The inputReadCallback callback did not return a 'status' value!",
-                    comms = 'error',
-                    level = 0
-                )
-                error.fatal(self, 'inputReadCallback',  drawBox = True)
+            d_read      = fn_inputReadCallback((path, data), **kwargs)
+            filesRead  += self.inputSet_store(path, d_read, d_tree, jrnl)['filesRead']
             return d_read
 
         def analysis_do(path, data, index, **kwargs):
-            nonlocal    filesAnalyzed
             nonlocal    d_tree
             nonlocal    fn_analysisCallback
 
             d_analysis          = fn_analysisCallback((path, d_tree[path]), **kwargs)
+            return analysis_apply(path, d_analysis)
 
-            if 'status' in d_analysis.keys():
-                if d_analysis['status']:
-                    # Analysis was successful
-                    if len(str_applyKey):
-                        d_tree[path]    = d_analysis[str_applyKey]
-                    else:
-                        d_tree[path]    = d_analysis
-                    if 'filesAnalyzed' in d_analysis.keys():
-                        filesAnalyzed       += d_analysis['filesAnalyzed']
-                    elif 'l_file' in d_analysis.keys():
-                        filesAnalyzed   += len(d_analysis['l_file'])
-                else:
-                    # If status was false, mark this key/path as
-                    # None
-                    d_tree[path]    = None
-            else:
-                self.dp.qprint(
-                    "The analysis callback did not return a 'status' value!",
-                    comms = 'error',
-                    level = 0
-                )
-                error.fatal(self, 'analysisCallback',  drawBox = True)
+        def analysis_apply(path, d_analysis):
+            """
+            Apply the result of an analysisCallback at <path> to the
+            d_tree, and account for the files analyzed.
+            """
+            nonlocal    filesAnalyzed
+            nonlocal    d_tree
+
+            d_store     = self.analysis_store(path, d_analysis, d_tree,
+                                              str_applyKey, jrnl)
+            with lock_count:
+                filesAnalyzed  += d_store['filesAnalyzed']
             return d_analysis
 
         def tree_removeDeadBranches():
@@ -865,13 +1576,11 @@ class pftree(object):
             d_tree dictionary -- creating a new copy of d_tree in the process
             """
             nonlocal d_tree
-            d_tree = { k : v for k, v in d_tree.items() if v}
-            # By creating a new binding for 'd_tree', we have effectively
-            # severed the connection back to the original dictionary.
-            # We now need to copy this d_tree to the self.d_inputTree
+            # By creating a new binding for 'd_tree', we effectively
+            # sever the connection back to the original dictionary, which
+            # processedTree_set() copies to the self.d_inputTree and
             # self.d_outputTree structures
-            self.d_inputTree    = d_tree
-            self.d_outputTree   = self.d_inputTree.copy()
+            d_tree = self.processedTree_set(d_tree, d_work)
 
         def outputSet_write(path, data):
             """
@@ -879,38 +1588,15 @@ class pftree(object):
             to specific leaf nodes in the <outputDir>.
             """
             nonlocal    filesSaved
-            nonlocal    index
             nonlocal    d_tree
-            nonlocal    fn_analysisCallback
             nonlocal    b_persistAnalysisResults
 
-            # self.simpleProgress_show(index, total, '%s:%s' %
-            #     ('%25s' % threading.currentThread().getName(),
-            #      '%25s' % fn_outputWriteCallback.__name__)
-            # )
-
-            if len(self.str_outputLeafDir):
-                (dirname, basename) = os.path.split(path)
-                str_format  = '\'%s\'' % self.str_outputLeafDir
-                new_basename = str_format + ' % basename'
-                str_eval    = eval(new_basename)
-                path        = '%s/%s' % (dirname, str_eval)
-
-            d_output        = fn_outputWriteCallback(
-                ( '%s/%s' % (self.str_outputDir, path), data), **kwargs
+            d_output    = fn_outputWriteCallback(
+                ( '%s/%s' % (self.str_outputDir, self.outputLeaf_resolve(path)), data),
+                **kwargs
             )
-
-            if 'status' in d_output.keys():
-                if not b_persistAnalysisResults:
-                    d_tree[path]    = d_output
-                filesSaved          += d_output['filesSaved']
-            else:
-                self.dp.qprint(
-                    "The outputWriteCallback callback did not return a 'status' value!",
-                    comms = 'error',
-                    level = 0
-                )
-                error.fatal(self, 'outputWriteCallback',  drawBox = True)
+            filesSaved += self.outputSet_store(path, d_output, d_tree,
+                                               b_persistAnalysisResults, jrnl)['filesSaved']
             return d_output
 
         def status_determine():
@@ -918,30 +1604,11 @@ class pftree(object):
             Return the status as a function of the individual status values
             of each of input/analyze/output.
             """
-            b_status        = False
-            b_statusInput   = True
-            b_statusAnalyze = True
-            b_statusOutput  = True
-            nonlocal dret_inputSet
-            nonlocal dret_analyze
-            nonlocal dret_outputSet
-            nonlocal fn_inputReadCallback
-            nonlocal fn_analysisCallback
-            nonlocal fn_outputWriteCallback
-
-            if fn_inputReadCallback:
-                if 'status' in dret_inputSet.keys():
-                    b_statusInput   = dret_inputSet['status']
-            if fn_analysisCallback:
-                if 'status' in dret_analyze.keys():
-                    b_statusAnalyze = dret_analyze['status']
-            if fn_outputWriteCallback:
-                if 'status' in dret_outputSet.keys():
-                    b_statusOutput  = dret_outputSet['status']
-
-            b_status = b_statusInput and b_statusAnalyze and b_statusOutput
             return {
-                'status': b_status
+                'status':   self.stagesStatus_determine(
+                                (fn_inputReadCallback,      dret_inputSet),
+                                (fn_analysisCallback,       dret_analyze),
+                                (fn_outputWriteCallback,    dret_outputSet))
             }
 
         def loop_nonThreaded():
@@ -971,10 +1638,10 @@ class pftree(object):
             b_outputStatusHist:     bool = False
 
             if int(self.verbosityLevel) and self.toConsole():
-                iterator        = tqdm( self.d_inputTree.items(),
+                iterator        = tqdm( d_work.items(),
                                     desc = str_desc)
             else:
-                iterator        = self.d_inputTree.items()
+                iterator        = d_work.items()
 
             for path, data in iterator:
                 dret_inputSet   = {}
@@ -1018,8 +1685,9 @@ class pftree(object):
             in thread-friendly order.
 
             This means performing *all* the reads sequentially
-            (non threaded), followed by the analysis threaded into
-            batches, followed by the writes all sequentially.
+            (non threaded), followed by the analysis on a pool of
+            self.numThreads worker threads, followed by the writes
+            all sequentially.
             """
             nonlocal index, total
             nonlocal d_tree
@@ -1031,45 +1699,78 @@ class pftree(object):
             nonlocal dret_outputSet
             nonlocal str_desc
 
-            def thread_createOnFunction(path, data, str_namePrefix, fn_thread):
+            def analysis_checkDone(s_done):
                 """
-                Simply create a thread function and return it.
+                Collect finished analysis futures, reporting (but
+                surviving) any analysis that raised.
                 """
-                nonlocal index
-                ta  = threading.Thread(
-                            name    = '%s-%04d.%d' % (str_namePrefix, index, self.numThreads),
-                            target  = fn_thread,
-                            args    = (path, data, index),
-                            kwargs  = kwargs
-                )
-                return ta
+                for future in s_done:
+                    try:
+                        future.result()
+                    except Exception:
+                        self.dp.qprint("Analysis failed", comms = 'error')
 
-            def threadsInBatches_run(l_threadAnalysis):
+            def analysis_checkChunksDone(s_done):
                 """
-                Run threads in batches of self.numThreads
-                and also handle any remaining threads.
+                Collect finished chunks of process pool analyses and
+                apply their results here, in the parent process.
                 """
-                index               = 1
-                if self.numThreads > total:
-                    self.numThreads = total
-                threadFullLoops     = int(total / self.numThreads)
-                threadRem           = total % self.numThreads
-                alreadyRunCount = thread_batch(
-                                        l_threadAnalysis,
-                                        threadFullLoops,
-                                        self.numThreads,
-                                        0)
-                nextRunCount    =  thread_batch(
-                                        l_threadAnalysis,
-                                        1,
-                                        threadRem,
-                                        alreadyRunCount)
+                for future in s_done:
+                    try:
+                        l_result    = future.result()
+                    except Exception:
+                        self.dp.qprint("Analysis failed", comms = 'error')
+                        continue
+                    for path, d_analysis in l_result:
+                        if d_analysis is None:
+                            self.dp.qprint("Analysis failed", comms = 'error')
+                        else:
+                            analysis_apply(path, d_analysis)
+
+            def analysis_processPool():
+                """
+                Run the analysisCallback on a pool of self.numThreads
+                processes, side stepping the GIL for CPU bound pure python
+                analyses.
+
+                The callback and kwargs are handed to each worker once, when
+                it starts (and, where possible, by fork rather than pickle),
+                so that only chunks of (path, data) work items and their
+                results travel between the processes.
+                """
+                nonlocal index
+                chunkSize   = max(1, min(64, total // (4 * self.numThreads)))
+                s_inFlight  = set()
+                l_chunk     = []
+                context     = None
+                if 'fork' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('fork')
+                with concurrent.futures.ProcessPoolExecutor(
+                        max_workers     = self.numThreads,
+                        mp_context      = context,
+                        initializer     = analysisWorker_init,
+                        initargs        = (fn_analysisCallback, kwargs)) as executor:
+                    for path, data in iterator:
+                        l_chunk.append((path, d_tree[path]))
+                        index += 1
+                        if len(l_chunk) < chunkSize: continue
+                        if len(s_inFlight) >= 2 * self.numThreads:
+                            s_done, s_inFlight = concurrent.futures.wait(
+                                s_inFlight,
+                                return_when = concurrent.futures.FIRST_COMPLETED
+                            )
+                            analysis_checkChunksDone(s_done)
+                        s_inFlight.add(executor.submit(analysisWorker_run, l_chunk))
+                        l_chunk     = []
+                    if l_chunk:
+                        s_inFlight.add(executor.submit(analysisWorker_run, l_chunk))
+                    analysis_checkChunksDone(concurrent.futures.as_completed(s_inFlight))
 
             if int(self.verbosityLevel) and self.toConsole():
-                iterator        = tqdm( self.d_inputTree.items(),
+                iterator        = tqdm( d_work.items(),
                                     desc = str_desc)
             else:
-                iterator        = self.d_inputTree.items()
+                iterator        = d_work.items()
 
             # Read
             if fn_inputReadCallback:
@@ -1081,20 +1782,29 @@ class pftree(object):
 
             # Analyze
             if fn_analysisCallback:
+                # A fixed pool of self.numThreads workers is fed from the
+                # tree, with at most two pending analyses per worker, so
+                # that workers never idle behind a straggler and memory
+                # stays bounded by the pool size, not the tree size.
                 index               = 1
-                l_threadAnalysis    = []
-                for path, data in iterator:
-                    l_threadAnalysis.append(thread_createOnFunction(
-                                                    path, data,
-                                                    'analysisThread',
-                                                    # t_analyze
-                                                    analysis_do
-                                            )
-                    )
-                    index += 1
-
-                # And now batch them in groups
-                threadsInBatches_run(l_threadAnalysis)
+                s_inFlight          = set()
+                if str_executor == 'process':
+                    analysis_processPool()
+                else:
+                    with concurrent.futures.ThreadPoolExecutor(
+                            max_workers         = self.numThreads,
+                            thread_name_prefix  = 'analysisThread') as executor:
+                        for path, data in iterator:
+                            if len(s_inFlight) >= 2 * self.numThreads:
+                                s_done, s_inFlight = concurrent.futures.wait(
+                                    s_inFlight,
+                                    return_when = concurrent.futures.FIRST_COMPLETED
+                                )
+                                analysis_checkDone(s_done)
+                            s_inFlight.add(executor.submit(
+                                            analysis_do, path, data, index, **kwargs))
+                            index += 1
+                        analysis_checkDone(concurrent.futures.as_completed(s_inFlight))
                 tree_removeDeadBranches()
             # Write
             if fn_outputWriteCallback:
@@ -1104,6 +1814,113 @@ class pftree(object):
                     # filesSaved      += dret_outputSet['filesSaved']
                     index += 1
 
+        def loop_pipelined():
+            """
+            Loop over the problem domain space with the three main
+            components (read, analysis, write) running concurrently as
+            pipeline stages connected by bounded queues:
+
+                read thread --> analysis threads (self.numThreads) --> write
+
+            so that the file IO of the read and write stages overlaps with
+            the analysis. At most self.inFlight directories are between
+            being read and being written at any time, which caps the
+            memory held by read data that has not yet been written out.
+            """
+            nonlocal index
+            nonlocal dret_inputSet
+            nonlocal dret_analyze
+            nonlocal dret_outputSet
+
+            workers             = max(1, self.numThreads)
+            inFlight            = self.inFlight if self.inFlight > 0 else 4 * workers
+            q_analyze           = queue.Queue(maxsize = inFlight)
+            q_write             = queue.Queue(maxsize = inFlight)
+            sem_inFlight        = threading.BoundedSemaphore(inFlight)
+            ev_abort            = threading.Event()
+            l_error             = []
+
+            b_analyzeStatusHist:    bool = False
+            b_inputStatusHist:      bool = False
+            b_outputStatusHist:     bool = False
+
+            def stage_read():
+                nonlocal b_inputStatusHist
+                try:
+                    for path, data in list(d_work.items()):
+                        sem_inFlight.acquire()
+                        if ev_abort.is_set(): break
+                        if fn_inputReadCallback:
+                            d_read  = inputSet_read(path, data)
+                            b_inputStatusHist = b_inputStatusHist or \
+                                                d_read.get('status', False)
+                        q_analyze.put(path)
+                except BaseException as e:
+                    l_error.append(e)
+                    ev_abort.set()
+                finally:
+                    for w in range(workers): q_analyze.put(None)
+
+            def stage_analyze():
+                nonlocal b_analyzeStatusHist
+                while True:
+                    path        = q_analyze.get()
+                    if path is None: break
+                    d_analysis  = {}
+                    if fn_analysisCallback and not ev_abort.is_set():
+                        try:
+                            d_analysis  = analysis_do(path, d_tree[path], index)
+                        except Exception:
+                            d_analysis  = {'status': False}
+                            self.dp.qprint("Analysis failed", comms = 'error')
+                        except BaseException as e:
+                            d_analysis  = {'status': False}
+                            l_error.append(e)
+                            ev_abort.set()
+                        b_analyzeStatusHist = b_analyzeStatusHist or \
+                                              d_analysis.get('status', False)
+                    q_write.put((path, d_analysis))
+                q_write.put(None)
+
+            l_thread    = [threading.Thread(target = stage_read, name = 'readStage')]
+            l_thread   += [threading.Thread(target  = stage_analyze,
+                                            name    = 'analysisStage-%02d' % w)
+                            for w in range(workers)]
+            for t in l_thread: t.start()
+
+            progressBar = None
+            if int(self.verbosityLevel) and self.toConsole():
+                progressBar = tqdm(total = total, desc = str_desc)
+
+            # The write stage runs here, in the calling thread
+            pending     = workers
+            while pending:
+                item    = q_write.get()
+                if item is None:
+                    pending -= 1
+                    continue
+                path, d_analysis    = item
+                if fn_outputWriteCallback and d_analysis.get('status', False) \
+                                          and not ev_abort.is_set():
+                    try:
+                        dret_outputSet      = outputSet_write(path, d_tree[path])
+                        b_outputStatusHist  = b_outputStatusHist or \
+                                              dret_outputSet.get('status', False)
+                    except BaseException as e:
+                        l_error.append(e)
+                        ev_abort.set()
+                index += 1
+                sem_inFlight.release()
+                if progressBar: progressBar.update()
+            for t in l_thread: t.join()
+            if progressBar: progressBar.close()
+            if l_error: raise l_error[0]
+
+            dret_inputSet       = {'status': b_inputStatusHist}
+            dret_analyze        = {'status': b_analyzeStatusHist}
+            dret_outputSet      = {'status': b_outputStatusHist}
+            tree_removeDeadBranches()
+
         for k, v in kwargs.items():
             if k == 'inputReadCallback':        fn_inputReadCallback        = v
             if k == 'analysisCallback':         fn_analysisCallback         = v
@@ -1111,6 +1928,9 @@ class pftree(object):
             if k == 'applyResultsTo':           str_applyResultsTo          = v
             if k == 'applyKey':                 str_applyKey                = v
             if k == 'persistAnalysisResults':   b_persistAnalysisResults    = v
+            if k == 'executor':                 str_executor                = v
+            if k == 'pipeline':                 b_pipeline                  = bool(v)
+            if k == 'journal':                  str_journal                 = v
 
         if fn_inputReadCallback:    str_desc = ' Reading      tree'
         if fn_analysisCallback:     str_desc = ' Analyzing    tree'
@@ -1121,23 +1941,61 @@ class pftree(object):
         if str_applyResultsTo == 'inputTree':
             d_tree          = self.d_inputTree
 
+        l_stages            = [ str_stage for str_stage, fn in (
+                                        ('read',    fn_inputReadCallback),
+                                        ('analyze', fn_analysisCallback),
+                                        ('write',   fn_outputWriteCallback)) if fn ]
+        jrnl, d_work, fileSetsSkipped = self.unpack(
+            self.journal_open(str_journal, l_stages),
+            'journal', 'd_work', 'fileSetsSkipped'
+        )
+        if fn_outputWriteCallback:
+            d_work, fileSetsUpToDate = self.unpack(
+                self.incremental_filter(d_work), 'd_work', 'fileSetsUpToDate'
+            )
+
         index               = 1
-        total               = len(self.d_inputTree.keys())
-        l_threadAnalysis    = []
+        total               = len(d_work.keys())
+
+        # The CLI refuses this combination; API callers are warned (but not
+        # on the console of a JSON run, where it would corrupt the output)
+        if b_pipeline and str_executor == 'process' and self.toConsole():
+            self.dp.qprint(
+                "The pipelined run has no process executor: " +
+                "its analysis stage runs in threads",
+                comms = 'warn',
+                level = 1
+            )
 
-        if not self.numThreads:
-            loop_nonThreaded()
-            str_processType     = "Not threaded"
-        else:
-            loop_threaded()
-            str_processType     = "Threaded"
+        try:
+            if b_pipeline:
+                loop_pipelined()
+                str_processType     = "Pipelined"
+            elif not self.numThreads:
+                loop_nonThreaded()
+                str_processType     = "Not threaded"
+            else:
+                loop_threaded()
+                if str_executor == 'process':
+                    str_processType = "Multiprocess"
+                else:
+                    str_processType = "Threaded"
+        finally:
+            if jrnl: jrnl.close()
 
         # pudb.set_trace()
 
+        # A run with nothing left to do, as all its directories were
+        # already done, is a success
+        b_status            = status_determine()['status'] or \
+                              (not total and bool(fileSetsSkipped + fileSetsUpToDate))
+
         return {
-            'status':               status_determine()['status'],
+            'status':               b_status,
             'processType':          str_processType,
-            'fileSetsProcessed':    index,
+            'fileSetsProcessed':    total,
+            'fileSetsSkipped':      fileSetsSkipped,
+            'fileSetsUpToDate':     fileSetsUpToDate,
             'filesRead':            filesRead,
             'filesAnalyzed':        filesAnalyzed,
             'filesSaved':           filesSaved,
@@ -1146,6 +2004,165 @@ class pftree(object):
             'd_outputCallback':     dret_outputSet
         }
 
+    async def tree_processAsync(self, *args, **kwargs):
+        """
+        An asyncio variant of tree_process() for callbacks that spend most
+        of their time waiting on something else (remote/stand in services,
+        object stores, etc). It accepts the same kwargs,
+
+            inputReadCallback       = callback to perform inputIO (read)
+            analysisCallback        = callback to perform analysis
+            outputWriteCallback     = callback to perform outputIO (write)
+            applyResultsTo          = 'inputTree'|'outputTree'
+            applyKey                = <arbitrary key in analysis dictionary>
+            persistAnalysisResults  = True|False
+
+        plus
+
+            concurrency             = <max number of directories in flight>
+
+        It journals, resumes and skips up to date outputs in the same way,
+        and returns the same dictionary as tree_process().
+
+        Each callback can be either a coroutine function, which is awaited
+        on the event loop, or a plain function, which is run in the loop's
+        default executor so as not to block the loop. Each directory goes
+        through its read/analysis/write chain in order, with up to
+        <concurrency> directories (default: max(1, self.numThreads))
+        processed at once:
+
+            d_ret = asyncio.run(pf_tree.tree_processAsync(...))
+        """
+        # Only needed (and imported) by the asyncio runs
+        import      asyncio
+
+        str_applyResultsTo          = ""
+        str_applyKey                = ""
+        fn_inputReadCallback        = None
+        fn_analysisCallback         = None
+        fn_outputWriteCallback      = None
+        b_persistAnalysisResults    = False
+        concurrency                 = max(1, self.numThreads)
+        str_journal                 = self.str_journal
+        d_tree                      = self.d_outputTree
+        filesRead                   = 0
+        filesAnalyzed               = 0
+        filesSaved                  = 0
+        index                       = 0
+        b_inputStatusHist           = False
+        b_analyzeStatusHist         = False
+        b_outputStatusHist          = False
+
+        for k, v in kwargs.items():
+            if k == 'inputReadCallback':        fn_inputReadCallback        = v
+            if k == 'analysisCallback':         fn_analysisCallback         = v
+            if k == 'outputWriteCallback':      fn_outputWriteCallback      = v
+            if k == 'applyResultsTo':           str_applyResultsTo          = v
+            if k == 'applyKey':                 str_applyKey                = v
+            if k == 'persistAnalysisResults':   b_persistAnalysisResults    = v
+            if k == 'concurrency':              concurrency                 = max(1, int(v))
+            if k == 'journal':                  str_journal                 = v
+
+        if str_applyResultsTo == 'inputTree':
+            d_tree          = self.d_inputTree
+
+        loop                = asyncio.get_running_loop()
+
+        async def callback_call(fn_callback, at_data) -> dict:
+            """
+            Await a coroutine callback, or run a plain one in the executor.
+            """
+            if inspect.iscoroutinefunction(fn_callback):
+                return await fn_callback(at_data, **kwargs)
+            return await loop.run_in_executor(
+                None, functools.partial(fn_callback, at_data, **kwargs)
+            )
+
+        async def path_process(path, data):
+            """
+            The read/analysis/write chain for a single directory.
+            """
+            nonlocal filesRead, filesAnalyzed, filesSaved
+            nonlocal b_inputStatusHist, b_analyzeStatusHist, b_outputStatusHist
+            d_analysis  = {}
+            if fn_inputReadCallback:
+                d_read  = await callback_call(fn_inputReadCallback, (path, data))
+                d_store = self.inputSet_store(path, d_read, d_tree, jrnl)
+                filesRead          += d_store['filesRead']
+                b_inputStatusHist   = b_inputStatusHist or d_store['status']
+            if fn_analysisCallback:
+                try:
+                    d_analysis  = await callback_call(fn_analysisCallback,
+                                                      (path, d_tree[path]))
+                except Exception:
+                    d_analysis  = {'status': False}
+                    self.dp.qprint("Analysis failed", comms = 'error')
+                d_store = self.analysis_store(path, d_analysis, d_tree,
+                                              str_applyKey, jrnl)
+                filesAnalyzed      += d_store['filesAnalyzed']
+                b_analyzeStatusHist = b_analyzeStatusHist or d_store['status']
+            if fn_outputWriteCallback and d_analysis.get('status', False):
+                d_output    = await callback_call(
+                    fn_outputWriteCallback,
+                    ('%s/%s' % (self.str_outputDir, self.outputLeaf_resolve(path)),
+                     d_tree[path])
+                )
+                d_store = self.outputSet_store(path, d_output, d_tree,
+                                               b_persistAnalysisResults, jrnl)
+                filesSaved         += d_store['filesSaved']
+                b_outputStatusHist  = b_outputStatusHist or d_store['status']
+
+        async def worker(it_tree):
+            """
+            Pull directories off the shared iterator until it is exhausted,
+            so that only <concurrency> tasks exist, whatever the tree size.
+            """
+            nonlocal index
+            for path, data in it_tree:
+                await path_process(path, data)
+                index += 1
+
+        l_stages    = [ str_stage for str_stage, fn in (
+                                ('read',    fn_inputReadCallback),
+                                ('analyze', fn_analysisCallback),
+                                ('write',   fn_outputWriteCallback)) if fn ]
+        jrnl, d_work, fileSetsSkipped = self.unpack(
+            self.journal_open(str_journal, l_stages),
+            'journal', 'd_work', 'fileSetsSkipped'
+        )
+        fileSetsUpToDate    = 0
+        if fn_outputWriteCallback:
+            d_work, fileSetsUpToDate = self.unpack(
+                self.incremental_filter(d_work), 'd_work', 'fileSetsUpToDate'
+            )
+        it_tree     = iter(list(d_work.items()))
+        try:
+            await asyncio.gather(*[worker(it_tree) for w in range(concurrency)])
+        finally:
+            if jrnl: jrnl.close()
+
+        # Remove the dead branches, as tree_process() does
+        self.processedTree_set(d_tree, d_work)
+
+        b_status    = self.stagesStatus_determine(
+                            (fn_inputReadCallback,      {'status': b_inputStatusHist}),
+                            (fn_analysisCallback,       {'status': b_analyzeStatusHist}),
+                            (fn_outputWriteCallback,    {'status': b_outputStatusHist})) or \
+                      (not len(d_work) and bool(fileSetsSkipped + fileSetsUpToDate))
+        return {
+            'status':               b_status,
+            'processType':          "Async",
+            'fileSetsProcessed':    index,
+            'fileSetsSkipped':      fileSetsSkipped,
+            'fileSetsUpToDate':     fileSetsUpToDate,
+            'filesRead':            filesRead,
+            'filesAnalyzed':        filesAnalyzed,
+            'filesSaved':           filesSaved,
+            'd_inputCallback':      {'status': b_inputStatusHist},
+            'd_analyzeCallback':    {'status': b_analyzeStatusHist},
+            'd_outputCallback':     {'status': b_outputStatusHist}
+        }
+
     def tree_analysisOutput(self, *args, **kwargs):
         """
         An optional method for looping over the <outputTree> and
@@ -1157,12 +2174,19 @@ class pftree(object):
         fn_outputcallback           = None
         for k, v in kwargs.items():
             if k == 'outputcallback':           fn_outputcallback           = v
-        index   = 1
-        total   = len(self.d_inputTree.keys())
-        for path, d_analysis in self.d_outputTree.items():
-            self.simpleProgress_show(index, total)
-            self.dp.qprint("Processing analysis results in output: %s" % path)
-            d_output        = fn_outputcallback((path, d_analysis), **kwargs)
+        reporter    = None
+        if int(self.verbosityLevel) >= 2 and self.toConsole():
+            reporter    = progress(' Processing analysis results',
+                                   total = len(self.d_inputTree)).start()
+        try:
+            for path, d_analysis in self.d_outputTree.items():
+                self.qprint_lazy("Processing analysis results in output: %s", path)
+                d_output        = fn_outputcallback((path, d_analysis), **kwargs)
+                if reporter:
+                    reporter.done      += 1
+                    reporter.str_path   = path
+        finally:
+            if reporter: reporter.stop()
         return {
             'status':   True
         }
@@ -1177,59 +2201,72 @@ class pftree(object):
 
     def stats_compute(self, *args, **kwargs):
         """
-        Simply loop over the internal dictionary and
-        echo the list size at each key (i.e. the number
-        of files).
+        Compute the size and file count totals over the tree, and a
+        report of the size of each directory, sorted on size.
+
+        The sizes and counts are gathered into columns once (see
+        stats.py), from which the totals and sort order are computed in
+        bulk. The per directory 'l_stats' rows are built lazily, when
+        accessed. If self.topN (the '--top <N>' CLI) is set, the rows
+        (and report) only cover the N largest directories (the N smallest
+        with self.b_statsReverse), which are selected without sorting the
+        whole tree; the totals are always computed over all the
+        directories.
+
+        If self.b_cumulative (the '--cumulative' CLI) is set, or if
+        self.summarizeDepth (the '--summarizeDepth <N>' CLI) is not
+        negative, each directory is reported with the cumulative size and
+        file count of its whole subtree, as GNU 'du' does, and in the
+        latter case only down to <N> levels below the input directory.
+
+        The text 'report' is only rendered if
+
+            kwargs:     report      = True
+
+        (the default).
         """
-        totalElements   = 0
-        totalKeys       = 0
-        totalSize       = 0
-        l_stats         = []
-        d_report        = {}
+        b_report        = True
         str_report      = ""
         l_range         = []
 
-        if int(self.verbosityLevel) and self.toConsole():
-            l_range     = tqdm(sorted(self.d_inputTreeCallback.items(),
-                            key         = lambda kv: (kv[1]['diskUsage_raw']),
-                            reverse     = self.b_statsReverse),
-                            desc = ' Processing  stats')
-        else:
-            l_range     = sorted(self.d_inputTreeCallback.items(),
-                            key         = lambda kv: (kv[1]['diskUsage_raw']),
-                            reverse     = self.b_statsReverse)
+        for k, v in kwargs.items():
+            if k == 'report':   b_report    = bool(v)
 
-        for k, v in l_range:
-            try:
-                if not self.args['du'] and not self.args['duf']:
-                    str_report  += "files: %5d│ raw_size: %12d│ human_size: %8s│ dir: %s\n" % (\
-                            len(self.d_inputTree[k]),
-                            self.d_inputTreeCallback[k]['diskUsage_raw'],
-                            self.d_inputTreeCallback[k]['diskUsage_human'],
-                            k)
-                else:
-                    str_report += '%-10s%s\n' % (
-                        self.d_inputTreeCallback[k]['diskUsage_human'], k)
-            except:
-                pass
-            d_report = {
-                'files':            len(self.d_inputTree[k]),
-                'diskUsage_raw':    self.d_inputTreeCallback[k]['diskUsage_raw'],
-                'diskUsage_human':  self.d_inputTreeCallback[k]['diskUsage_human'],
-                'path':             k
-            }
-            l_stats.append(d_report)
-            totalElements   += len(v)
-            totalKeys       += 1
-            totalSize       += self.d_inputTreeCallback[k]['diskUsage_raw']
-        str_totalSize_human = self.sizeof_fmt(totalSize)
+        columns         = statsColumns(self.d_inputTree, self.d_inputTreeCallback)
+        reported        = columns
+        if self.b_cumulative or self.summarizeDepth >= 0:
+            str_root    = '.' if self.b_relativeDir else self.str_inputDir
+            reported    = columns.rollup(str_root, self.summarizeDepth)
+        order           = reported.order(self.b_statsReverse, self.topN)
+        l_stats         = statsRows(reported, order)
+
+        if b_report:
+            if int(self.verbosityLevel) and self.toConsole():
+                l_range = tqdm(order, desc = ' Processing  stats')
+            else:
+                l_range = order
+            l_path      = reported.l_path
+            a_size      = reported.column_list(reported.a_size)
+            if not self.args['du'] and not self.args['duf']:
+                a_count = reported.column_list(reported.a_count)
+                str_report  = ''.join([
+                    "files: %5d│ raw_size: %12d│ human_size: %8s│ dir: %s\n" % (
+                        a_count[i], a_size[i], sizeof_fmt(a_size[i]), l_path[i])
+                    for i in l_range])
+            else:
+                str_report  = ''.join([
+                    '%-10s%s\n' % (sizeof_fmt(a_size[i]), l_path[i])
+                    for i in l_range])
+
+        totalSize       = columns.totalSize()
         return {
             'status':           True,
             'report':           str_report,
-            'dirs':             totalKeys,
-            'files':            totalElements,
+            'dirs':             len(columns),
+            'dirsReported':     len(order),
+            'files':            columns.totalFiles(),
             'totalSize':        totalSize,
-            'totalSize_human':  str_totalSize_human,
+            'totalSize_human':  self.sizeof_fmt(totalSize),
             'l_stats':          l_stats,
             'runTime':          other.toc()
         }
@@ -1254,10 +2291,10 @@ class pftree(object):
             str_path        = at_data[0]
             l_file          = at_data[1]
 
-        self.dp.qprint("reading (in path %s):\n%s" %
-                            (str_path,
-                            self.pp.pformat(l_file)),
-                            level = 5)
+        self.qprint_lazy("reading (in path %s):\n%s",
+                         str_path,
+                         lambda: self.pp.pformat(l_file),
+                         level = 5)
         filesRead   = len(l_file)
 
         if not len(l_file): b_status = False
@@ -1293,11 +2330,11 @@ class pftree(object):
             d_read          = at_data[1]
 
         b_status        = True
-        self.dp.qprint("analyzing:\n%s" %
-                                self.pp.pformat(d_read['l_file']),
-                                level = 5)
+        self.qprint_lazy("analyzing:\n%s",
+                         lambda: self.pp.pformat(d_read['l_file']),
+                         level = 5)
         if int(self.f_sleepLength):
-            self.dp.qprint("sleeping for: %f" % self.f_sleepLength, level = 5)
+            self.qprint_lazy("sleeping for: %f", self.f_sleepLength, level = 5)
             time.sleep(self.f_sleepLength)
         filesAnalyzed   = len(d_read['l_file'])
 
@@ -1325,7 +2362,7 @@ class pftree(object):
             str_outfile         = '%s/file-count.txt'   % path
 
         with open(str_outfile, 'w') as f:
-            self.dp.qprint("saving: %s" % (str_outfile), level = 5)
+            self.qprint_lazy("saving: %s", str_outfile, level = 5)
             if not self.testType:
                 f.write('%s`' % self.pp.pformat(d_outputInfo['l_file']))
             else:
@@ -1374,11 +2411,69 @@ class pftree(object):
     def unpack(d : dict, *keys):
         return tuple(d[k] for k in keys)
 
+    def ndjson_write(self, d_record : dict):
+        """
+        Write <d_record> as one compact line of JSON (NDJSON) to stdout.
+        """
+        sys.stdout.write(json.dumps(d_record, separators = (',', ':'),
+                                    default = json_default) + '\n')
+
     def run(self, *args, **kwargs):
         """
         Probe the input tree and print.
+
+        With self.b_ndjson (the '--ndjson' CLI), the output is streamed as
+        NDJSON instead: one record per directory, written as soon as the
+        directory is constructed,
+
+            {"path": <path>, "files": <count>, "diskUsage_raw": <size>}
+
+        followed by a final summary record (with "summary": true) of the
+        run status and totals, in place of the --json and --jsonStats
+        dumps. This keeps the output memory flat, and with '--stream' lets
+        a consumer start on the first directories while the walk goes on.
+
+        Each directory has exactly one record. The walk probe engine lists
+        the root directory twice, so its record is only written once the
+        tree is constructed, from the tree itself; the summary totals are
+        likewise those of the constructed tree, as in the --stats report.
         """
 
+        def ndjson_record(str_path, l_series, d_constructCallback):
+            """
+            Stream the record of a newly constructed directory (other than
+            the root, see ndjson_rootRecord()).
+            """
+            if str_path == (str_rootDir.rstrip(os.sep) or str_rootDir): return
+            size        = 0
+            if d_constructCallback is not None:
+                size    = d_constructCallback['diskUsage_raw']
+            self.ndjson_write({
+                'path':             str_path,
+                'files':            len(l_series),
+                'diskUsage_raw':    size
+            })
+
+        def ndjson_rootRecord():
+            """
+            Write the record of the root directory as constructed, and
+            return the totals of the constructed tree for the summary.
+            """
+            str_root    = str_rootDir.rstrip(os.sep) or str_rootDir
+            if str_root in self.d_inputTree:
+                d_size  = self.d_inputTreeCallback.get(str_root)
+                self.ndjson_write({
+                    'path':             str_root,
+                    'files':            len(self.d_inputTree[str_root]),
+                    'diskUsage_raw':    d_size['diskUsage_raw'] if d_size else 0
+                })
+            return {
+                'dirs':         len(self.d_inputTree),
+                'files':        sum(len(l_file) for l_file in self.d_inputTree.values()),
+                'totalSize':    sum(d_size['diskUsage_raw']
+                                    for d_size in self.d_inputTreeCallback.values())
+            }
+
         def filters_show():
             """
             Show the filters used
@@ -1404,8 +2499,13 @@ class pftree(object):
             """
             nonlocal d_stats, b_status
             log         = slog()
-            d_stats     = self.stats_compute()
-            if self.toConsole() or self.args['duf'] or self.args['du']:
+            d_stats     = self.stats_compute(
+                            report = self.toConsole() or
+                                     self.args['du'] or self.args['duf'])
+            if self.b_ndjson and (self.args['duf'] or self.args['du']):
+                # stdout only carries the NDJSON records
+                print(d_stats['report'], file = sys.stderr)
+            elif self.toConsole() or self.args['duf'] or self.args['du']:
                 self.dp.qprint(d_stats['report'], level = self.debugLevel)
             slog_filter = filters_show()
             log.title_set('Size statistics')
@@ -1454,9 +2554,13 @@ class pftree(object):
             """
             nonlocal d_test, b_status, d_filter, d_stats
 
+            # Note that any fileFilter/dirFilter has already been applied
+            # during the walk itself (see tree_walk()), so there is no need
+            # for a separate filterFileHitList() pass over the tree here,
+            # only for a summary of what the filters hit.
             if len(self.args['fileFilter']) or len(self.args['dirFilter']):
-                d_filter    = self.filterFileHitList()
-                b_status    = d_filter['status']
+                d_filter    = self.filterHits_summarize()
+                b_status    = b_status and d_filter['status']
             if self.b_test:
                 d_test      = self.test_run(*args, **kwargs)
                 b_status    = b_status and d_test['status']
@@ -1493,20 +2597,49 @@ class pftree(object):
         d_env           = {}
         d_filter        = {}
         str_rootDir     = ''
+        d_ndjson        = {'dirs': 0, 'files': 0, 'totalSize': 0}
+        fn_record       = ndjson_record if self.b_ndjson else None
 
         timer_startIfNeeded()
         b_status, str_error = self.unpack(self.env_check(), 'status', 'error')
 
         if b_status:
             str_origDir = os.getcwd()
-            d_tree      = self.tree_construct(
-                d_probe             = self.tree_probe(root = tree_resolveRoot()),
-                constructCallback   = self.dirsize_get
-            )
+            if self.b_stream:
+                d_tree  = self.tree_construct(
+                    probeStream         = self.tree_walk(root = tree_resolveRoot()),
+                    constructCallback   = self.dirsize_get,
+                    recordCallback      = fn_record
+                )
+            else:
+                # The probe is part of the --json dump, where it keeps its
+                # full path file lists; otherwise these are never needed
+                d_tree  = self.tree_construct(
+                    d_probe             = self.tree_probe(
+                                            root        = tree_resolveRoot(),
+                                            fullPaths   = self.b_json),
+                    constructCallback   = self.dirsize_get,
+                    recordCallback      = fn_record
+                )
             b_status    = d_tree['status']
+            if self.b_ndjson:
+                d_ndjson    = ndjson_rootRecord()
+            if len(self.str_snapshot):
+                d_tree['d_snapshot']    = snapshot_write(
+                                            self.str_snapshot,
+                                            self.d_inputTree,
+                                            self.d_inputTreeCallback)
+            if len(self.str_sqlite):
+                d_tree['d_sqlite']      = sqlite_write(
+                                            self.str_sqlite,
+                                            self.d_inputTree,
+                                            self.d_inputTreeCallback,
+                                            str_root    = str_rootDir,
+                                            b_files     = self.b_sqliteFiles)
             d_post      = postProcess_check()
-            if self.b_jsonStats:
-                print(json.dumps(d_post['stats'], indent = 4, sort_keys = True))
+            if self.b_jsonStats and not self.b_ndjson:
+                print(json.dumps(d_post['stats'], indent = 4, sort_keys = True,
+                                 default = json_default))
 
             if self.b_relativeDir:
                 os.chdir(str_origDir)
@@ -1521,7 +2654,19 @@ class pftree(object):
             'runTime':      other.toc()
         }
 
-        if self.b_json:
-            print(json.dumps(d_ret, indent = 4, sort_keys = True))
+        if self.b_ndjson:
+            self.ndjson_write({
+                'summary':          True,
+                'status':           b_status,
+                'str_error':        str_error,
+                'dirs':             d_ndjson['dirs'],
+                'files':            d_ndjson['files'],
+                'totalSize':        d_ndjson['totalSize'],
+                'totalSize_human':  self.sizeof_fmt(d_ndjson['totalSize']),
+                'runTime':          d_ret['runTime']
+            })
+        elif self.b_json:
+            print(json.dumps(d_ret, indent = 4, sort_keys = True,
+                             default = json_default))
 
         return d_ret
@@ -0,0 +1,117 @@
+"""
+A rate limited progress reporter for the long running pftree loops.
+
+The loops being reported on only maintain a few plain counters on the
+reporter (and the path they are at), which costs an attribute update per
+directory. A separate daemon thread renders these counters to the console
+at a fixed wall-clock rate, so that the console output (and its cost) is
+bounded by time rather than by the size of the tree.
+
+    reporter    = progress(' Probing filesystem')
+    reporter.start()
+    for ...:
+        reporter.dirs      += 1
+        reporter.files     += len(l_files)
+        reporter.str_path   = root
+    reporter.stop()
+"""
+
+# System imports
+import      sys
+import      time
+import      shutil
+import      threading
+
+def path_shorten(str_path, length) -> str:
+    """
+    Shorten <str_path> to at most <length> characters by eliding its
+    middle, which keeps both its root and its leaf readable.
+    """
+    if len(str_path) <= length:
+        return str_path
+    if length <= 3:
+        return str_path[-length:] if length > 0 else ''
+    head    = (length - 3) // 2
+    tail    = length - 3 - head
+    return str_path[:head] + '...' + str_path[len(str_path) - tail:]
+
+class progress(object):
+    """
+    Counters of a running loop, rendered every <f_interval> seconds.
+    """
+
+    def __init__(self, str_desc, f_interval = 0.25, total = 0, stream = None):
+        self.str_desc       : str   = str_desc
+        self.f_interval     : float = f_interval
+        self.total          : int   = total
+        self.stream                 = stream if stream is not None else sys.stdout
+        self.dirs           : int   = 0
+        self.files          : int   = 0
+        self.done           : int   = 0
+        self.str_path       : str   = ''
+        self.b_tty          : bool  = hasattr(self.stream, 'isatty') and \
+                                      self.stream.isatty()
+        self.columns        : int   = shutil.get_terminal_size().columns
+        self.f_start        : float = 0.0
+        self.ev_stop                = threading.Event()
+        self.thread                 = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def line_render(self) -> str:
+        """
+        The current status line (without the path), for example
+
+            Probing filesystem: 1234 dirs, 56789 files [2.5 s, 493.6/s]
+        """
+        f_elapsed   = time.monotonic() - self.f_start
+        l_count     = []
+        if self.dirs:   l_count.append('%d dirs'    % self.dirs)
+        if self.files:  l_count.append('%d files'   % self.files)
+        if self.done or self.total:
+            if self.total:
+                l_count.append('%d/%d done' % (self.done, self.total))
+            else:
+                l_count.append('%d done' % self.done)
+        rate        = max(self.dirs, self.done) / f_elapsed if f_elapsed else 0
+        return '%s: %s [%.1f s, %.1f/s]' % (self.str_desc, ', '.join(l_count),
+                                            f_elapsed, rate)
+
+    def render(self, b_final = False):
+        str_line    = self.line_render()
+        if self.b_tty:
+            if self.str_path and not b_final:
+                str_line += ' ' + path_shorten(self.str_path,
+                                               self.columns - len(str_line) - 2)
+            self.stream.write('\r' + str_line[:self.columns - 1] + '\033[K' +
+                              ('\n' if b_final else ''))
+        else:
+            self.stream.write(str_line + '\n')
+        self.stream.flush()
+
+    def run(self):
+        while not self.ev_stop.wait(self.f_interval):
+            self.render()
+
+    def start(self):
+        self.f_start    = time.monotonic()
+        self.ev_stop.clear()
+        self.thread     = threading.Thread(target = self.run,
+                                           name   = 'progress',
+                                           daemon = True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the updates, and render the final counts.
+        """
+        if self.thread is None: return
+        self.ev_stop.set()
+        self.thread.join()
+        self.thread     = None
+        self.render(b_final = True)
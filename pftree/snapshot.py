@@ -0,0 +1,239 @@
+"""
+A compact, memory mappable binary snapshot of a constructed pftree.
+
+A snapshot holds, for each directory of the d_inputTree, its path, the
+number of files in it and its size (the 'diskUsage_raw' of its
+d_inputTreeCallback entry, if any). It is written in one streaming pass
+over the sorted paths and is read through an mmap, so that lookups and
+totals on a large tree never build the tree in Python objects.
+
+The file layout (all little endian: on a big endian host the columns are
+byte swapped as they are written and read) is
+
+    header      '<8sIIQQQQQ': magic, version, blockSize, count and the
+                offsets of the paths, restarts, sizes and counts sections
+    paths       the sorted paths, front coded: each as a varint length of
+                the prefix shared with the previous path, a varint length
+                of the rest, and the rest (UTF-8) -- with the shared length
+                forced to zero every <blockSize> paths (a "restart")
+    restarts    uint64[ceil(count/blockSize)], the offset of each restart
+                in the paths section
+    sizes       uint64[count], aligned with the sorted paths
+    counts      uint32[count], aligned with the sorted paths
+
+A lookup is a binary search over the restart paths followed by a scan of
+at most <blockSize> paths.
+"""
+
+# System imports
+import      os
+import      sys
+import      mmap
+import      struct
+from        array               import  array
+from        collections.abc     import  Mapping
+
+str_magic       = b'PFTSNAP1'
+version         = 1
+str_header      = '<8sIIQQQQQ'
+headerLength    = struct.calcsize(str_header)
+
+def varint_encode(n) -> bytes:
+    """
+    Encode a non-negative int as a LEB128 varint.
+    """
+    l_byte  = bytearray()
+    while n >= 0x80:
+        l_byte.append((n & 0x7f) | 0x80)
+        n >>= 7
+    l_byte.append(n)
+    return bytes(l_byte)
+
+def varint_decode(buf, pos) -> tuple:
+    """
+    Decode the LEB128 varint at <pos> in <buf>, returning (n, pos after).
+    """
+    n       = 0
+    shift   = 0
+    while True:
+        b       = buf[pos]
+        pos    += 1
+        n      |= (b & 0x7f) << shift
+        if b < 0x80: return n, pos
+        shift  += 7
+
+def path_encode(str_path) -> bytes:
+    return str_path.encode('utf-8', 'surrogateescape')
+
+def path_decode(b_path) -> str:
+    return b_path.decode('utf-8', 'surrogateescape')
+
+def snapshot_write(str_snapshotFile, d_inputTree, d_inputTreeCallback = None,
+                   blockSize = 16) -> dict:
+    """
+    Write the <d_inputTree> (and the sizes in the <d_inputTreeCallback>)
+    to <str_snapshotFile>. The paths are written as they are front coded,
+    while the size/count columns are gathered in compact arrays that are
+    written after them, followed by the header.
+    """
+    if d_inputTreeCallback is None: d_inputTreeCallback = {}
+    l_path      = sorted(d_inputTree.keys(), key = path_encode)
+    a_restart   = array('Q')
+    a_size      = array('Q')
+    a_count     = array('I')
+    str_tmp     = '%s.%d.tmp' % (str_snapshotFile, os.getpid())
+    with open(str_tmp, 'wb') as fh:
+        fh.write(b'\0' * headerLength)
+        offset      = 0
+        b_prev      = b''
+        for i, str_path in enumerate(l_path):
+            b_path  = path_encode(str_path)
+            shared  = 0
+            if i % blockSize:
+                l_max   = min(len(b_prev), len(b_path))
+                while shared < l_max and b_prev[shared] == b_path[shared]:
+                    shared += 1
+            else:
+                a_restart.append(offset)
+            b_record    = varint_encode(shared) + \
+                          varint_encode(len(b_path) - shared) + \
+                          b_path[shared:]
+            fh.write(b_record)
+            offset     += len(b_record)
+            b_prev      = b_path
+            d_callback  = d_inputTreeCallback.get(str_path)
+            size        = 0
+            if isinstance(d_callback, Mapping):
+                size    = int(d_callback.get('diskUsage_raw', 0))
+            a_size.append(size)
+            a_count.append(len(d_inputTree[str_path] or []))
+        fh.write(b'\0' * (-(headerLength + offset) % 8))
+        if sys.byteorder == 'big':
+            for a_column in (a_restart, a_size, a_count): a_column.byteswap()
+        offset_restarts = fh.tell()
+        a_restart.tofile(fh)
+        offset_sizes    = fh.tell()
+        a_size.tofile(fh)
+        offset_counts   = fh.tell()
+        a_count.tofile(fh)
+        fh.seek(0)
+        fh.write(struct.pack(str_header, str_magic, version, blockSize,
+                             len(l_path), headerLength, offset_restarts,
+                             offset_sizes, offset_counts))
+    os.replace(str_tmp, str_snapshotFile)
+    return {
+        'status':       True,
+        'snapshotFile': str_snapshotFile,
+        'dirs':         len(l_path)
+    }
+
+class snapshot(object):
+    """
+    A read only, mmap backed view of a snapshot file, offering
+
+        snap.lookup(path)   -> (files, size) or None
+        path in snap
+        len(snap)
+        snap.items()        -> iterator of (path, files, size)
+        snap.stats()        -> the total files, size and dirs
+
+    None of these load the whole snapshot into Python objects.
+    """
+
+    def __init__(self, str_snapshotFile):
+        self.str_snapshotFile   = str_snapshotFile
+        with open(str_snapshotFile, 'rb') as fh:
+            self.mm             = mmap.mmap(fh.fileno(), 0, access = mmap.ACCESS_READ)
+        (b_magic, fileVersion, self.blockSize, self.count, self.offset_paths,
+         offset_restarts, offset_sizes, offset_counts) = \
+            struct.unpack_from(str_header, self.mm, 0)
+        if b_magic != str_magic or fileVersion != version:
+            self.mm.close()
+            raise ValueError('%s is not a pftree snapshot' % str_snapshotFile)
+        mv              = memoryview(self.mm)
+        blocks          = (self.count + self.blockSize - 1) // self.blockSize
+        self.l_mv       = [mv]
+        l_column        = []
+        for offset, length, str_type in (
+                (offset_restarts,   8 * blocks,     'Q'),
+                (offset_sizes,      8 * self.count, 'Q'),
+                (offset_counts,     4 * self.count, 'I')):
+            self.l_mv.append(mv[offset : offset + length])
+            if sys.byteorder == 'big':
+                # The little endian columns are swapped into arrays, rather
+                # than read in place
+                a_column    = array(str_type)
+                a_column.frombytes(self.l_mv[-1])
+                a_column.byteswap()
+                l_column.append(a_column)
+            else:
+                self.l_mv.append(self.l_mv[-1].cast(str_type))
+                l_column.append(self.l_mv[-1])
+        self.mv_restart, self.mv_size, self.mv_count = l_column
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for mv in reversed(self.l_mv):
+            mv.release()
+        self.mm.close()
+
+    def __len__(self):
+        return self.count
+
+    def block_read(self, block):
+        """
+        Yield the (index, path bytes) of the paths in <block>.
+        """
+        pos     = self.offset_paths + self.mv_restart[block]
+        b_path  = b''
+        first   = block * self.blockSize
+        for i in range(first, min(first + self.blockSize, self.count)):
+            shared, pos = varint_decode(self.mm, pos)
+            length, pos = varint_decode(self.mm, pos)
+            b_path      = b_path[:shared] + self.mm[pos : pos + length]
+            pos        += length
+            yield i, b_path
+
+    def index(self, str_path) -> int:
+        """
+        Return the index of <str_path> in the snapshot, or -1.
+        """
+        b_target    = path_encode(str_path)
+        lo, hi      = 0, len(self.mv_restart)
+        # Find the last block whose restart path is <= the target
+        while lo < hi:
+            mid     = (lo + hi) // 2
+            b_first = next(self.block_read(mid))[1]
+            if b_first <= b_target: lo = mid + 1
+            else:                   hi = mid
+        if not lo: return -1
+        for i, b_path in self.block_read(lo - 1):
+            if b_path == b_target:  return i
+            if b_path > b_target:   break
+        return -1
+
+    def lookup(self, str_path):
+        i   = self.index(str_path)
+        if i < 0: return None
+        return self.mv_count[i], self.mv_size[i]
+
+    def __contains__(self, str_path):
+        return self.index(str_path) >= 0
+
+    def items(self):
+        for block in range(len(self.mv_restart)):
+            for i, b_path in self.block_read(block):
+                yield path_decode(b_path), self.mv_count[i], self.mv_size[i]
+
+    def stats(self) -> dict:
+        return {
+            'status':       True,
+            'totalSize':    sum(self.mv_size),
+            'files':        sum(self.mv_count),
+            'dirs':         self.count
+        }
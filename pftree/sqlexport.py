@@ -0,0 +1,131 @@
+"""
+An SQLite export of a constructed pftree, for repeated queries.
+
+The export holds one row per directory of the d_inputTree, with its
+parent directory, its depth below the tree root, its number of files and
+its size (the 'diskUsage_raw' of its d_inputTreeCallback entry, if any),
+and optionally one row per file:
+
+    dirs    (id INTEGER PRIMARY KEY, path TEXT UNIQUE, parent TEXT,
+             depth INTEGER, files INTEGER, size INTEGER)
+    files   (dir INTEGER, name TEXT)
+    meta    (key TEXT PRIMARY KEY, value TEXT)
+
+with indexes on dirs(parent), dirs(depth) and dirs(size) (and files(dir)),
+besides the unique index on dirs(path). A question such as "which subject
+dirs have more than N series larger than X" is then a single indexed
+query, for example
+
+    SELECT parent, COUNT(*) FROM dirs
+        WHERE depth = 2 AND size > X GROUP BY parent HAVING COUNT(*) > N
+
+The rows are inserted in batches, each in one transaction, and the indexes
+are only built once all rows are in.
+"""
+
+# System imports
+import      os
+import      itertools
+from        collections.abc     import  Mapping
+
+version         = 1
+
+str_schema      = """
+    CREATE TABLE meta  (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE dirs  (id INTEGER PRIMARY KEY, path TEXT UNIQUE, parent TEXT,
+                        depth INTEGER, files INTEGER, size INTEGER);
+    CREATE TABLE files (dir INTEGER, name TEXT);
+"""
+
+str_indexes     = """
+    CREATE INDEX dirs_parent ON dirs (parent);
+    CREATE INDEX dirs_depth  ON dirs (depth);
+    CREATE INDEX dirs_size   ON dirs (size);
+    CREATE INDEX files_dir   ON files (dir);
+"""
+
+def sqlite_write(str_dbFile, d_inputTree, d_inputTreeCallback = None,
+                 str_root = '', b_files = False, batchSize = 10000) -> dict:
+    """
+    Write the <d_inputTree> (and the sizes in the <d_inputTreeCallback>)
+    to the SQLite <str_dbFile>, with the file names of each directory too
+    if <b_files>. Depths are counted from <str_root> (the root directory of
+    the tree) which, if not given, is taken as the shortest path.
+
+    The database is built in a temporary file that then replaces any
+    existing <str_dbFile>, so that it never holds a partial export.
+    """
+    # Only imported for an export, to keep it out of the pftree startup
+    import  sqlite3
+
+    if d_inputTreeCallback is None: d_inputTreeCallback = {}
+    if not str_root and len(d_inputTree):
+        str_root    = min(d_inputTree.keys(), key = len)
+    str_root        = str_root.rstrip(os.sep) or str_root
+    rootDepth       = str_root.count(os.sep) if str_root != os.sep else 0
+    dirs            = 0
+    files           = 0
+
+    def dir_rows():
+        """
+        Generate the dirs (and files) rows in tree order.
+        """
+        nonlocal files
+        for dirId, (str_path, l_file) in enumerate(d_inputTree.items(), 1):
+            l_file      = l_file or []
+            str_parent  = None
+            depth       = 0
+            if str_path != str_root:
+                str_parent  = os.path.dirname(str_path)
+                depth       = str_path.count(os.sep) - rootDepth
+            d_callback  = d_inputTreeCallback.get(str_path)
+            size        = 0
+            if isinstance(d_callback, Mapping):
+                size    = int(d_callback.get('diskUsage_raw', 0))
+            files      += len(l_file)
+            yield (dirId, str_path, str_parent, depth, len(l_file), size), \
+                  [ (dirId, str_file) for str_file in l_file ] if b_files else []
+
+    str_tmp     = '%s.%d.tmp' % (str_dbFile, os.getpid())
+    str_dir     = os.path.dirname(str_dbFile)
+    if len(str_dir): os.makedirs(str_dir, exist_ok = True)
+    if os.path.exists(str_tmp): os.remove(str_tmp)
+    db          = sqlite3.connect(str_tmp, isolation_level = None)
+    try:
+        # The temporary database is discarded on any failure, so it needs
+        # no rollback journal nor syncs until it is complete
+        db.execute('PRAGMA journal_mode = OFF')
+        db.execute('PRAGMA synchronous = OFF')
+        db.executescript(str_schema)
+        rows    = dir_rows()
+        while True:
+            l_batch = list(itertools.islice(rows, batchSize))
+            if not l_batch: break
+            db.execute('BEGIN')
+            db.executemany('INSERT INTO dirs VALUES (?, ?, ?, ?, ?, ?)',
+                           [ t_dir for t_dir, l_file in l_batch ])
+            if b_files:
+                db.executemany('INSERT INTO files VALUES (?, ?)',
+                               itertools.chain.from_iterable(
+                                   l_file for t_dir, l_file in l_batch))
+            db.execute('COMMIT')
+            dirs   += len(l_batch)
+        db.executemany('INSERT INTO meta VALUES (?, ?)', [
+                            ('version', str(version)),
+                            ('root',    str_root),
+                            ('files',   str(int(b_files)))
+                       ])
+        db.executescript('BEGIN;' + str_indexes + 'COMMIT;')
+        db.execute('ANALYZE')
+    except:
+        db.close()
+        os.remove(str_tmp)
+        raise
+    db.close()
+    os.replace(str_tmp, str_dbFile)
+    return {
+        'status':   True,
+        'dbFile':   str_dbFile,
+        'dirs':     dirs,
+        'files':    files
+    }
@@ -0,0 +1,276 @@
+"""
+Per-directory size statistics for pftree.
+
+A pftree holds one size record per directory in its d_inputTreeCallback.
+These are dirStat records rather than dicts: a dirStat only stores the raw
+size of the directory, in a __slots__ record, and formats the human
+readable size only when it is asked for (typically when a report row is
+rendered). A dirStat still reads like the original dictionary,
+
+    {'status': True, 'diskUsage_raw': <int>, 'diskUsage_human': <str>}
+
+and is turned into one by dict(), or by json_default() for json.dumps().
+
+The tree statistics are computed on a statsColumns table: the sizes and
+file counts of all directories gathered in two columns, on which the
+totals and the sort order are single vectorized operations. NumPy is used
+for the columns of large trees if it is installed, and the array module
+otherwise. NumPy is only imported on first use, since for small trees its
+import alone costs more than the whole computation. Report rows are only
+built for the directories that are emitted.
+"""
+
+# System imports
+import      os
+import      heapq
+from        array               import  array
+from        collections.abc     import  Mapping, Sequence
+
+# NumPy, once imported by numpy_get()
+np              = None
+b_numpyTried    = False
+
+# The smallest number of directories for which the columns use NumPy
+numpyThreshold  = 4096
+
+def numpy_get():
+    """
+    Return the numpy module (imported on the first call), or None if it
+    is not installed.
+    """
+    global np, b_numpyTried
+    if not b_numpyTried:
+        b_numpyTried    = True
+        try:
+            import  numpy
+            np      = numpy
+        except ImportError:
+            np      = None
+    return np
+
+def sizeof_fmt(num, suffix = 'B') -> str:
+    for unit in ['','k','M','G','T','P','E','Z']:
+        if abs(num) < 1024.0:
+            return "%3.1f%s%s" % (num, unit, suffix)
+        num /= 1024.0
+    return "%.1f%s%s" % (num, 'Yi', suffix)
+
+class dirStat(Mapping):
+    """
+    The size record of a single directory, with dict-style read access.
+    """
+
+    __slots__   = ('diskUsage_raw',)
+    t_keys      = ('status', 'diskUsage_raw', 'diskUsage_human')
+
+    def __init__(self, diskUsage_raw = 0):
+        self.diskUsage_raw  = diskUsage_raw
+
+    @property
+    def diskUsage_human(self) -> str:
+        return sizeof_fmt(self.diskUsage_raw)
+
+    def __getitem__(self, key):
+        if key == 'diskUsage_raw':      return self.diskUsage_raw
+        if key == 'diskUsage_human':    return self.diskUsage_human
+        if key == 'status':             return True
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(dirStat.t_keys)
+
+    def __len__(self):
+        return len(dirStat.t_keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (dirStat, (self.diskUsage_raw,))
+
+class statsColumns(object):
+    """
+    The directory paths of a tree with their sizes and file counts, as
+    columns aligned on the order of the <d_inputTreeCallback>.
+
+    The columns are NumPy arrays (and self.np is the numpy module) for
+    trees of at least numpyThreshold directories if NumPy is installed, and
+    array module arrays (with self.np None) otherwise.
+    """
+
+    def __init__(self, d_inputTree = None, d_inputTreeCallback = None):
+        self.l_path     : list  = []
+        l_size                  = []
+        l_count                 = []
+        if d_inputTreeCallback is None: d_inputTreeCallback = {}
+        for str_path, d_size in d_inputTreeCallback.items():
+            self.l_path.append(str_path)
+            l_size.append(d_size['diskUsage_raw'])
+            l_count.append(len(d_inputTree[str_path]))
+        self.columns_set(l_size, l_count)
+
+    def columns_set(self, l_size, l_count):
+        self.np     = numpy_get() if len(l_size) >= numpyThreshold else None
+        if self.np is not None:
+            self.a_size     = self.np.array(l_size,  dtype = self.np.int64)
+            self.a_count    = self.np.array(l_count, dtype = self.np.int64)
+        else:
+            self.a_size     = array('q', l_size)
+            self.a_count    = array('q', l_count)
+
+    def __len__(self):
+        return len(self.l_path)
+
+    def totalSize(self) -> int:
+        return int(self.a_size.sum()) if self.np is not None else sum(self.a_size)
+
+    def totalFiles(self) -> int:
+        return int(self.a_count.sum()) if self.np is not None else sum(self.a_count)
+
+    def rollup(self, str_root, depth = -1):
+        """
+        Return a new statsColumns of the cumulative (GNU du like) size and
+        file count of each subtree under <str_root>: each directory totals
+        its own files and those of all the directories below it. The
+        directories between <str_root> and the directories in the tree
+        that hold no files themselves are included, and, if <depth> is
+        not negative, only the directories down to this depth below the
+        <str_root> are kept (as 'du --max-depth').
+
+        This is a single bottom-up pass: the directories are bucketed by
+        depth, and each, deepest first, adds its totals to its parent only.
+        """
+        str_root    = str_root.rstrip(os.sep) or str_root
+        rootDepth   = str_root.count(os.sep) if str_root != os.sep else 0
+        d_size      = {}
+        d_count     = {}
+        l_depth     = []
+        l_size      = self.column_list(self.a_size)
+        l_count     = self.column_list(self.a_count)
+
+        def node_add(str_path, size, count):
+            if str_path not in d_size:
+                d_size[str_path]    = 0
+                d_count[str_path]   = 0
+                level   = 0
+                if str_path != str_root:
+                    level   = str_path.count(os.sep) - rootDepth
+                while len(l_depth) <= level: l_depth.append([])
+                l_depth[level].append(str_path)
+            d_size[str_path]    += size
+            d_count[str_path]   += count
+
+        for str_path, size, count in zip(self.l_path, l_size, l_count):
+            node_add(str_path.rstrip(os.sep) or str_path, size, count)
+        for level in range(len(l_depth) - 1, 0, -1):
+            for str_path in l_depth[level]:
+                str_parent  = os.path.dirname(str_path)
+                if str_parent == str_path: continue
+                node_add(str_parent, d_size[str_path], d_count[str_path])
+
+        columns         = statsColumns()
+        l_size          = []
+        l_count         = []
+        for level, l_path in enumerate(l_depth):
+            if 0 <= depth < level: break
+            for str_path in l_path:
+                columns.l_path.append(str_path)
+                l_size.append(d_size[str_path])
+                l_count.append(d_count[str_path])
+        columns.columns_set(l_size, l_count)
+        return columns
+
+    def column_list(self, a_column) -> list:
+        """
+        A <a_column> as a list of Python ints, for fast per-row access.
+        """
+        return a_column.tolist()
+
+    def top(self, top, b_smallest = False):
+        """
+        The row indices of the <top> largest directories, i.e. the first
+        <top> rows of the descending order (ties in tree order), unsorted
+        -- or, with <b_smallest>, of the <top> smallest directories, the
+        first <top> rows of the ascending order. This is a partial
+        selection, rather than a sort of all the rows.
+        """
+        if self.np is not None:
+            # The size of the <top>th largest (smallest) row splits the
+            # selection into the rows beyond it, and the first of the rows
+            # tied with it
+            if b_smallest:
+                kth         = self.np.partition(self.a_size, top - 1)[top - 1]
+                a_beyond    = self.np.flatnonzero(self.a_size < kth)
+            else:
+                kth         = self.np.partition(self.a_size, len(self) - top)[len(self) - top]
+                a_beyond    = self.np.flatnonzero(self.a_size > kth)
+            a_tied      = self.np.flatnonzero(self.a_size == kth)[:top - len(a_beyond)]
+            return self.np.concatenate((a_beyond, a_tied))
+        fn_select   = heapq.nsmallest if b_smallest else heapq.nlargest
+        return fn_select(top, range(len(self.l_path)), key = self.a_size.__getitem__)
+
+    def order(self, b_reverse = False, top = 0):
+        """
+        The row indices sorted on size, ascending (or descending with
+        <b_reverse>). The sort is stable in both directions, i.e. rows of
+        equal size keep their tree order, as with sorted(..., reverse=).
+
+        With a non-zero <top>, only the rows of the <top> largest
+        directories (or smallest, with <b_reverse>) are returned, in the
+        same direction.
+        """
+        if 0 < top < len(self):
+            a_top       = self.top(top, b_smallest = b_reverse)
+            if self.np is not None:
+                a_top   = self.np.sort(a_top)
+                a_key   = -self.a_size[a_top] if b_reverse else self.a_size[a_top]
+                return a_top[self.np.argsort(a_key, kind = 'stable')]
+            return sorted(sorted(a_top),
+                          key       = self.a_size.__getitem__,
+                          reverse   = b_reverse)
+        if self.np is not None:
+            if b_reverse:
+                return self.np.argsort(-self.a_size, kind = 'stable')
+            return self.np.argsort(self.a_size, kind = 'stable')
+        return sorted(range(len(self.l_path)),
+                      key       = self.a_size.__getitem__,
+                      reverse   = b_reverse)
+
+    def row(self, i) -> dict:
+        size    = int(self.a_size[i])
+        return {
+            'files':            int(self.a_count[i]),
+            'diskUsage_raw':    size,
+            'diskUsage_human':  sizeof_fmt(size),
+            'path':             self.l_path[i]
+        }
+
+class statsRows(Sequence):
+    """
+    A lazy sequence of the report rows (dicts) of a statsColumns table
+    in a given row order. A row is only built when it is accessed.
+    """
+
+    def __init__(self, columns, order):
+        self.columns    = columns
+        self.order      = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return statsRows(self.columns, self.order[i])
+        return self.columns.row(self.order[i])
+
+def json_default(o):
+    """
+    A json.dumps() default hook that serializes dirStat records (and any
+    other read only mapping) as dictionaries, and the lazy statsRows as
+    lists.
+    """
+    if isinstance(o, Mapping):
+        return dict(o)
+    if isinstance(o, Sequence):
+        return list(o)
+    raise TypeError('Object of type %s is not JSON serializable' % type(o).__name__)
@@ -0,0 +1,170 @@
+"""
+A compact store for the path keyed trees of pftree.
+
+The d_inputTree, d_inputTreeCallback and d_outputTree of a pftree are
+dictionaries keyed on directory path. For deep hierarchies, most of the
+memory of these keys goes to the same leading path components, repeated
+for every directory under them.
+
+A pathTable instead stores each directory once, as a node that points to
+its parent node and to its (interned) name, so that each distinct path
+component is only stored once whatever the number of paths that share it.
+A pathDict is a dict-like mapping from paths to values on top of such a
+table, and several pathDicts can (and in pftree do) share one table.
+Paths are only rebuilt as strings when the keys are iterated.
+"""
+
+# System imports
+import      os
+import      threading
+from        array               import  array
+from        collections.abc     import  MutableMapping, ItemsView
+
+class pathTable(object):
+    """
+    A parent pointer table of path nodes with interned names.
+    """
+
+    def __init__(self, str_sep = os.sep):
+        self.str_sep        : str   = str_sep
+        self.l_name         : list  = []
+        self.d_nameId       : dict  = {}
+        self.a_parent               = array('q')
+        self.a_name                 = array('q')
+        # (parent + 1) << 32 | nameId  -->  node
+        self.d_child        : dict  = {}
+        self.lock                   = threading.Lock()
+
+    def __len__(self):
+        return len(self.a_parent)
+
+    def node_get(self, str_path, b_create = False) -> int:
+        """
+        Return the node of <str_path>, or -1 if it is not in the table.
+        With <b_create>, the node (and any missing parent nodes) are
+        added to the table instead.
+        """
+        node    = -1
+        for str_name in str_path.split(self.str_sep):
+            nameId  = self.d_nameId.get(str_name)
+            if nameId is None:
+                if not b_create: return -1
+                nameId  = len(self.l_name)
+                self.l_name.append(str_name)
+                self.d_nameId[str_name] = nameId
+            key     = (node + 1) << 32 | nameId
+            child   = self.d_child.get(key)
+            if child is None:
+                if not b_create: return -1
+                child   = len(self.a_parent)
+                self.a_parent.append(node)
+                self.a_name.append(nameId)
+                self.d_child[key]   = child
+            node    = child
+        return node
+
+    def path_get(self, node) -> str:
+        """
+        Rebuild the path string of <node>.
+        """
+        l_name  = []
+        while node >= 0:
+            l_name.append(self.l_name[self.a_name[node]])
+            node    = self.a_parent[node]
+        return self.str_sep.join(reversed(l_name))
+
+# Marks the nodes of a pathTable that are not keys of a given pathDict
+nodeAbsent  = object()
+
+class pathItems(ItemsView):
+    """
+    An items view of a pathDict that walks its nodes directly, rather
+    than looking each key up again.
+    """
+
+    def __iter__(self):
+        path_get    = self._mapping.table.path_get
+        for node, value in enumerate(self._mapping.l_value):
+            if value is not nodeAbsent:
+                yield path_get(node), value
+
+class pathDict(MutableMapping):
+    """
+    A dict-like mapping of path strings to values, on the nodes of a
+    (possibly shared) pathTable. The values are held in a list indexed by
+    node, so that a key costs one list slot on top of its (shared) node.
+
+    Iteration is in node order, i.e. in the order in which paths were
+    first added to the table -- which, unlike a dict, lists a parent
+    directory before its children even if it was set after them.
+    """
+
+    def __init__(self, table = None, d_init = None):
+        self.table      = table if table is not None else pathTable()
+        self.l_value    = []
+        self.count      = 0
+        if d_init: self.update(d_init)
+
+    def node_value(self, node):
+        if 0 <= node < len(self.l_value):
+            return self.l_value[node]
+        return nodeAbsent
+
+    def __getitem__(self, str_path):
+        value   = self.node_value(self.table.node_get(str_path))
+        if value is nodeAbsent: raise KeyError(str_path)
+        return value
+
+    def __setitem__(self, str_path, value):
+        node    = self.table.node_get(str_path)
+        if node < 0:
+            with self.table.lock:
+                node    = self.table.node_get(str_path, b_create = True)
+        if node >= len(self.l_value):
+            self.l_value.extend([nodeAbsent] * (len(self.table) - len(self.l_value)))
+        if self.l_value[node] is nodeAbsent: self.count += 1
+        self.l_value[node]  = value
+
+    def __delitem__(self, str_path):
+        node    = self.table.node_get(str_path)
+        if self.node_value(node) is nodeAbsent: raise KeyError(str_path)
+        self.l_value[node]  = nodeAbsent
+        self.count         -= 1
+
+    def __contains__(self, str_path):
+        return self.node_value(self.table.node_get(str_path)) is not nodeAbsent
+
+    def __iter__(self):
+        path_get    = self.table.path_get
+        for node, value in enumerate(self.l_value):
+            if value is not nodeAbsent:
+                yield path_get(node)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self.items()))
+
+    def items(self):
+        return pathItems(self)
+
+    def copy(self):
+        """
+        A shallow copy that shares the path table.
+        """
+        d_copy          = pathDict(self.table)
+        d_copy.l_value  = self.l_value.copy()
+        d_copy.count    = self.count
+        return d_copy
+
+    def filtered(self, fn_keep):
+        """
+        A shallow copy (sharing the path table) of only the entries
+        whose value passes <fn_keep>.
+        """
+        d_copy          = pathDict(self.table)
+        d_copy.l_value  = [ v if v is not nodeAbsent and fn_keep(v) else nodeAbsent
+                            for v in self.l_value ]
+        d_copy.count    = sum(v is not nodeAbsent for v in d_copy.l_value)
+        return d_copy
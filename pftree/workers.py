@@ -0,0 +1,32 @@
+"""
+Process pool workers for pftree.tree_process().
+
+These live in their own module so that they can be pickled by reference
+and resolved by the worker processes.
+"""
+
+# The analysisCallback (and its kwargs) of a process pool worker. This is set
+# once per worker process by analysisWorker_init(), so that only the work
+# items themselves need to be shipped to the worker.
+fn_analysisWorker       = None
+d_analysisWorkerKwargs  = {}
+
+def analysisWorker_init(fn_analysisCallback, d_kwargs):
+    global fn_analysisWorker, d_analysisWorkerKwargs
+    fn_analysisWorker       = fn_analysisCallback
+    d_analysisWorkerKwargs  = d_kwargs
+
+def analysisWorker_run(l_chunk):
+    """
+    Run the worker's analysisCallback over a chunk of (path, data) items
+    and return the list of (path, d_analysis) results. A failed analysis
+    returns a None result.
+    """
+    l_result    = []
+    for path, data in l_chunk:
+        try:
+            d_analysis  = fn_analysisWorker((path, data), **d_analysisWorkerKwargs)
+        except Exception:
+            d_analysis  = None
+        l_result.append((path, d_analysis))
+    return l_result
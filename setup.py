@@ -19,7 +19,8 @@ setup(
       author_email     =   'dev@babymri.org',
       url              =   'https://github.com/FNNDSC/pftree',
       packages         =   ['pftree'],
-      install_requires =   ['tqdm', 'pfmisc', 'pudb'],
+      install_requires =   ['tqdm', 'pfmisc'],
+      extras_require   =   {'numpy': ['numpy']},
       entry_points={
           'console_scripts': [
               'pftree = pftree.__main__:main'